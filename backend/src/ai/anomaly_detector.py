@@ -0,0 +1,211 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/anomaly_detector.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from ai.task_queue import get_task_queue
+
+GLOBAL_SCOPE = "global"
+DETECTED_METRICS = ("mse", "mae")
+# Absolute alert levels; metrics without one only get CUSUM (shift) alerts
+DEFAULT_THRESHOLDS = {"mse": 0.05}
+
+
+class StreamState:
+    def __init__(self, baseline_alpha=0.05, level_alpha=0.2):
+        """
+        Running state of one metric stream: a slow EWMA baseline (mean and variance),
+        a fast EWMA of the current level and a one-sided CUSUM of standardized increases.
+        """
+        self.baseline_alpha = baseline_alpha
+        self.level_alpha = level_alpha
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+        self.level = None
+        self.cusum = 0.0
+        self.above_threshold = False
+        self.last_alert = {}  # reason -> monotonic time of its last alert
+
+    def update(self, value, slack):
+        """
+        Fold in one value and return its CUSUM statistic (scored against the baseline before the update).
+        """
+        self.count += 1
+        self.level = value if self.level is None else self.level_alpha * value + (1 - self.level_alpha) * self.level
+        if self.count == 1:
+            self.mean = value
+            return 0.0
+
+        std = math.sqrt(self.variance)
+        # Floor the scale so a perfectly flat baseline does not turn noise into huge z-scores
+        scale = max(std, 0.05 * abs(self.mean), 1e-9)
+        z = (value - self.mean) / scale
+        self.cusum = max(0.0, self.cusum + z - slack)
+
+        delta = value - self.mean
+        self.mean += self.baseline_alpha * delta
+        self.variance = (1 - self.baseline_alpha) * (self.variance + self.baseline_alpha * delta * delta)
+        return self.cusum
+
+
+class StreamingAnomalyDetector:
+    def __init__(self, metrics=DETECTED_METRICS, thresholds=None, warmup=20, slack=0.5, limit=5.0,
+                 cooldown=300.0, max_streams=10000, emit=None):
+        """
+        In-memory regression detection over the performance metric stream, per user and globally.
+        Each observation is O(1) and never touches the database; alerts are handed to `emit`
+        on a background queue.
+        :param thresholds: Per-metric absolute level (fast EWMA) above which a stream is flagged
+                           (defaults to DEFAULT_THRESHOLDS)
+        :param warmup: Observations per stream before any alert is raised
+        :param slack: CUSUM allowance k, in baseline standard deviations
+        :param limit: CUSUM decision limit h, in baseline standard deviations
+        :param cooldown: Minimum seconds between alerts of the same kind for the same stream
+        :param max_streams: Per-user streams kept (least recently updated are evicted)
+        :param emit: Callable(details, notification_type) receiving alerts (defaults to create_notification)
+        """
+        self.metrics = tuple(metrics)
+        self.thresholds = dict(DEFAULT_THRESHOLDS if thresholds is None else thresholds)
+        self.warmup = warmup
+        self.slack = slack
+        self.limit = limit
+        self.cooldown = cooldown
+        self.max_streams = max_streams
+        self.emit = emit or _create_notification
+        self.alerts = 0
+        self._streams = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _stream(self, scope, metric):
+        key = (scope, metric)
+        state = self._streams.get(key)
+        if state is None:
+            state = StreamState()
+            self._streams[key] = state
+            if len(self._streams) > self.max_streams:
+                self._evict()
+        else:
+            self._streams.move_to_end(key)
+        return state
+
+    def _evict(self):
+        for key in self._streams:
+            if key[0] != GLOBAL_SCOPE:
+                del self._streams[key]
+                return
+
+    def observe(self, log, user_id=None):
+        """
+        Consume one evaluation (a performance log entry). Returns the alerts raised, if any.
+        """
+        scopes = [GLOBAL_SCOPE] if user_id is None else [GLOBAL_SCOPE, user_id]
+        alerts = []
+        now = time.monotonic()
+        with self._lock:
+            for metric in self.metrics:
+                value = log.get(metric)
+                if value is None:
+                    continue
+                value = float(value)
+                for scope in scopes:
+                    alert = self._update(scope, metric, value, now)
+                    if alert:
+                        alerts.append(alert)
+        for alert in alerts:
+            self._dispatch(alert)
+        return alerts
+
+    def observe_many(self, logs, user_id=None):
+        alerts = []
+        for log in logs:
+            alerts.extend(self.observe(log, user_id))
+        return alerts
+
+    def _update(self, scope, metric, value, now):
+        state = self._stream(scope, metric)
+        cusum = state.update(value, self.slack)
+        baseline = state.mean
+
+        if state.count <= self.warmup:
+            return None
+
+        def cooled_down(reason):
+            return now - state.last_alert.get(reason, -math.inf) >= self.cooldown
+
+        reason = None
+        if cusum > self.limit:
+            state.cusum = 0.0
+            if cooled_down("shift"):
+                reason = "shift"
+        threshold = self.thresholds.get(metric)
+        crossed = threshold is not None and state.level > threshold
+        if crossed and not state.above_threshold and reason is None and cooled_down("threshold"):
+            reason = "threshold"
+
+        if reason is None:
+            # A suppressed crossing is raised again once the cooldown ends
+            state.above_threshold = crossed and state.above_threshold
+            return None
+        state.above_threshold = crossed
+        state.last_alert[reason] = now
+        self.alerts += 1
+        return {
+            "scope": scope,
+            "metric": metric,
+            "reason": reason,
+            "value": value,
+            "level": state.level,
+            "baseline": baseline,
+            "cusum": cusum,
+            "threshold": threshold,
+        }
+
+    def _dispatch(self, alert):
+        subject = "all users" if alert["scope"] == GLOBAL_SCOPE else f"user {alert['scope']}"
+        metric = alert["metric"].upper()
+        if alert["reason"] == "shift":
+            details = (f"{metric} regression detected for {subject}: {alert['value']:.4f} "
+                       f"vs baseline {alert['baseline']:.4f} (CUSUM {alert['cusum']:.1f})")
+        else:
+            details = (f"{metric} above threshold for {subject}: recent level {alert['level']:.4f} "
+                       f"> {alert['threshold']}")
+        print(f"🚨 {details}")
+        get_task_queue("notifications").submit(self.emit, details, "Performance Regression",
+                                               key=("anomaly", alert["scope"], alert["metric"]), dedup_window=0)
+
+    def level(self, metric, scope=GLOBAL_SCOPE):
+        """
+        Recent level (fast EWMA) of a stream, or None if it has no observations.
+        """
+        with self._lock:
+            state = self._streams.get((scope, metric))
+            return state.level if state else None
+
+    def status(self, scope=GLOBAL_SCOPE):
+        with self._lock:
+            return {
+                metric: {"count": state.count, "baseline": state.mean, "std": math.sqrt(state.variance),
+                         "level": state.level, "cusum": state.cusum, "above_threshold": state.above_threshold}
+                for (stream_scope, metric), state in self._streams.items() if stream_scope == scope
+            }
+
+
+def _create_notification(details, notification_type):
+    from api.notification_manager import create_notification
+    create_notification(details, notification_type)
+
+
+# One detector per process so every evaluation path feeds the same global stream
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_anomaly_detector(**options):
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = StreamingAnomalyDetector(**options)
+        return _detector
@@ -0,0 +1,194 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/behavior_clustering.py
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import MiniBatchKMeans
+
+FEATURES = ("mse", "mae")
+
+
+class OnlineBehaviorClusters:
+    def __init__(self, n_clusters=3, min_points=5, refit_interval=500):
+        """
+        Incremental k-means over (mse, mae) points for one user.
+        Each new point moves its nearest centroid with the per-centroid learning rate
+        MiniBatchKMeans uses (1 / points assigned so far), so an update is O(n_clusters).
+        :param n_clusters: Number of behavior clusters
+        :param min_points: Points collected before the centroids are first fitted
+        :param refit_interval: Incremental updates after which a full refit is due
+        """
+        self.n_clusters = n_clusters
+        self.min_points = max(min_points, n_clusters)
+        self.refit_interval = refit_interval
+        self.centers = None
+        self.counts = np.zeros(n_clusters)
+        self.pending = []
+        self.updates_since_refit = 0
+
+    @property
+    def fitted(self):
+        return self.centers is not None
+
+    @property
+    def refit_due(self):
+        return self.fitted and self.updates_since_refit >= self.refit_interval
+
+    def update(self, point):
+        """
+        Fold one (mse, mae) point into the model and return its cluster label
+        (None while the model is still collecting its first points).
+        """
+        point = np.asarray(point, dtype=float)
+        if not self.fitted:
+            self.pending.append(point.tolist())
+            if len(self.pending) < self.min_points:
+                return None
+            self.refit(self.pending)
+            return self.predict(point)
+
+        label = self.predict(point)
+        self.counts[label] += 1
+        self.centers[label] += (point - self.centers[label]) / self.counts[label]
+        self.updates_since_refit += 1
+        return label
+
+    def predict(self, point):
+        distances = ((self.centers - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+        return int(np.argmin(distances))
+
+    def refit(self, points):
+        """
+        Fit the centroids from scratch on `points` (e.g. the user's recent history).
+        New centroids are matched to the old ones so existing labels keep their meaning.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, len(FEATURES))
+        if len(points) < self.n_clusters:
+            # Too little history to refit: back off a full interval instead of retrying on every update
+            self.updates_since_refit = 0
+            return
+        kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=42, n_init=3).fit(points)
+        centers = kmeans.cluster_centers_
+        counts = np.bincount(kmeans.labels_, minlength=self.n_clusters).astype(float)
+
+        if self.fitted:
+            cost = ((self.centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            _, order = linear_sum_assignment(cost)
+            centers, counts = centers[order], counts[order]
+
+        self.centers = centers
+        self.counts = counts
+        self.pending = []
+        self.updates_since_refit = 0
+
+    def to_dict(self):
+        return {
+            "n_clusters": self.n_clusters,
+            "centers": self.centers.tolist() if self.fitted else None,
+            "counts": self.counts.tolist(),
+            "pending": self.pending,
+            "updates_since_refit": self.updates_since_refit,
+        }
+
+    @classmethod
+    def from_dict(cls, data, **options):
+        model = cls(n_clusters=data.get("n_clusters", 3), **options)
+        if data.get("centers") is not None:
+            model.centers = np.asarray(data["centers"], dtype=float)
+            model.counts = np.asarray(data["counts"], dtype=float)
+        model.pending = list(data.get("pending", []))
+        model.updates_since_refit = data.get("updates_since_refit", 0)
+        return model
+
+
+class BehaviorClusterEngine:
+    def __init__(self, logs_collection, profiles_collection, n_clusters=3, refit_interval=500,
+                 refit_history=1000, cache_size=10000, lock_stripes=64):
+        """
+        Per-user online clustering of error behavior, persisted in `user_profiles`.
+        Models are cached in memory (LRU) and written back with the user's cluster label,
+        so an evaluation costs one profile update instead of a full history scan and refit.
+        :param refit_history: Most recent logs used when a model is (re)fitted from the database
+        :param lock_stripes: Per-user locks (users hashed onto a fixed set), so different users update in parallel
+        """
+        self.logs = logs_collection
+        self.profiles = profiles_collection
+        self.n_clusters = n_clusters
+        self.refit_interval = refit_interval
+        self.refit_history = refit_history
+        self.cache_size = cache_size
+        self._models = OrderedDict()
+        self._lock = threading.Lock()  # guards the model cache only; no I/O under it
+        self._user_locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def _user_lock(self, user_id):
+        return self._user_locks[hash(user_id) % len(self._user_locks)]
+
+    def _new_model(self):
+        return OnlineBehaviorClusters(n_clusters=self.n_clusters, refit_interval=self.refit_interval)
+
+    def _recent_points(self, user_id):
+        cursor = (self.logs.find({"user_id": user_id}, {"_id": 0, **{f: 1 for f in FEATURES}})
+                  .sort("timestamp", -1).limit(self.refit_history))
+        return [[log[f] for f in FEATURES] for log in cursor if all(f in log for f in FEATURES)]
+
+    def _load(self, user_id):
+        # Caller holds the user's lock, so only this thread can be loading this user
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is not None:
+                self._models.move_to_end(user_id)
+                return model
+
+        profile = self.profiles.find_one({"user_id": user_id}, {"behavior_model": 1}) or {}
+        if profile.get("behavior_model"):
+            model = OnlineBehaviorClusters.from_dict(profile["behavior_model"], refit_interval=self.refit_interval)
+        else:
+            # First time this process sees the user: bootstrap from the stored history once
+            model = self._new_model()
+            history = self._recent_points(user_id)
+            if len(history) >= model.min_points:
+                model.refit(history)
+            else:
+                model.pending = history
+
+        with self._lock:
+            self._models[user_id] = model
+            if len(self._models) > self.cache_size:
+                self._models.popitem(last=False)
+        return model
+
+    def update(self, user_id, mse, mae):
+        """
+        Add one evaluation to the user's model, refit if it is due, and store the cluster label.
+        Returns the label, or None while the user has too few points.
+        """
+        with self._user_lock(user_id):
+            model = self._load(user_id)
+            label = model.update([mse, mae])
+            if model.refit_due:
+                model.refit(self._recent_points(user_id))
+                # The bounded history read can lag the write-behind buffer; make sure the newest point counts
+                label = model.predict([mse, mae])
+
+            update = {"behavior_model": model.to_dict()}
+            if label is not None:
+                update["behavior_cluster"] = label
+            self.profiles.update_one({"user_id": user_id}, {"$set": update}, upsert=True)
+        return label
+
+    def refit_user(self, user_id):
+        """
+        Force a full refit of one user's model from their recent history.
+        """
+        with self._user_lock(user_id):
+            model = self._load(user_id)
+            history = self._recent_points(user_id)
+            model.refit(history)
+            update = {"behavior_model": model.to_dict()}
+            if model.fitted and history:
+                update["behavior_cluster"] = model.predict(history[0])  # newest log
+            self.profiles.update_one({"user_id": user_id}, {"$set": update}, upsert=True)
+        return model
@@ -0,0 +1,113 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/behavior_clustering_job.py
+
+import argparse
+import datetime
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from ai.behavior_clustering import FEATURES, OnlineBehaviorClusters
+from db.mongo_registry import get_db
+
+
+def stream_user_points(collection, history=1000, batch_size=5000):
+    """
+    Yield (user_id, points) for every user, newest point first, reading the logs once in
+    (user_id, timestamp desc) order so the user_id_timestamp index serves the sort.
+    :param history: Most recent points kept per user
+    """
+    cursor = collection.find(
+        {"user_id": {"$exists": True}},
+        {"_id": 0, "user_id": 1, **{f: 1 for f in FEATURES}},
+        batch_size=batch_size,
+    ).sort([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+    for user_id, logs in itertools.groupby(cursor, key=lambda log: log["user_id"]):
+        points = [[log[f] for f in FEATURES] for log in itertools.islice(logs, history)
+                  if all(f in log for f in FEATURES)]
+        # Drain the rest of this user's logs (older than the history window)
+        for _ in logs:
+            pass
+        if points:
+            yield user_id, points
+
+
+def cluster_users(chunk, n_clusters=3):
+    """
+    Worker: fit one model per user in the chunk.
+    Returns (user_id, model state, label of the newest point) for each user with enough data.
+    """
+    results = []
+    for user_id, points in chunk:
+        model = OnlineBehaviorClusters(n_clusters=n_clusters)
+        if len(points) < model.min_points:
+            continue
+        model.refit(points)
+        results.append((user_id, model.to_dict(), model.predict(points[0])))
+    return results
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_labels(profiles, results, fitted_at):
+    if not results:
+        return 0
+    profiles.bulk_write([
+        UpdateOne(
+            {"user_id": user_id},
+            {"$set": {"behavior_cluster": label, "behavior_model": state, "behavior_fitted_at": fitted_at}},
+            upsert=True,
+        )
+        for user_id, state, label in results
+    ], ordered=False)
+    return len(results)
+
+
+def run_batch_clustering(db=None, workers=None, chunk_size=200, history=1000, n_clusters=3):
+    """
+    Recompute every user's behavior clusters in parallel and store the labels in `user_profiles`.
+    Users are streamed from `ai_performance_logs`, chunked, and fitted in a process pool;
+    at most two chunks per worker are in flight so memory stays bounded.
+    :param workers: Worker processes (defaults to the CPU count)
+    :param chunk_size: Users per task sent to a worker
+    :param history: Most recent logs per user used for the fit
+    """
+    db = db if db is not None else get_db()
+    workers = workers or os.cpu_count() or 1
+    logs, profiles = db["ai_performance_logs"], db["user_profiles"]
+    fitted_at = datetime.datetime.utcnow()
+    started = time.monotonic()
+    users = 0
+
+    chunks = _chunks(stream_user_points(logs, history), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(cluster_users, chunk, n_clusters))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                users += sum(_write_labels(profiles, f.result(), fitted_at) for f in done)
+        for future in pending:
+            users += _write_labels(profiles, future.result(), fitted_at)
+
+    print(f"✅ Batch clustering labelled {users} users in {time.monotonic() - started:.1f}s")
+    return users
+
+
+if __name__ == "__main__":
+    # python -m ai.behavior_clustering_job [--workers N] [--chunk-size N] [--history N]
+    parser = argparse.ArgumentParser(description="Recompute user behavior clusters for all users.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--history", type=int, default=1000)
+    args = parser.parse_args()
+    run_batch_clustering(workers=args.workers, chunk_size=args.chunk_size, history=args.history)
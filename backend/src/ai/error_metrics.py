@@ -0,0 +1,217 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/error_metrics.py
+
+import base64
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RunningStat:
+    def __init__(self, window=100, alpha=0.1):
+        """
+        Incremental statistics for a single error metric.
+        Every update is O(1) and memory is bounded by the window size.
+        :param window: Number of most recent values kept for the fixed-window average
+        :param alpha: Smoothing factor of the exponentially weighted average (0 < alpha <= 1)
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = None
+        self.min = None
+        self.max = None
+        self.recent = deque(maxlen=window)
+        self.window_sum = 0.0
+        self._updates_since_resum = 0
+
+    def update(self, value):
+        """
+        Fold a new value into the running mean/variance, EWMA and window sum.
+        """
+        value = float(value)
+
+        # Welford's online mean/variance
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        if len(self.recent) == self.recent.maxlen:
+            self.window_sum -= self.recent[0]
+        self.recent.append(value)
+        self.window_sum += value
+
+        # Re-sum once per full window to stop floating point drift (amortized O(1))
+        self._updates_since_resum += 1
+        if self._updates_since_resum >= self.recent.maxlen:
+            self.window_sum = math.fsum(self.recent)
+            self._updates_since_resum = 0
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def window_mean(self):
+        return self.window_sum / len(self.recent) if self.recent else 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "ewma": self.ewma if self.ewma is not None else 0.0,
+            "window_mean": self.window_mean,
+            "window_size": len(self.recent),
+            "min": self.min if self.min is not None else 0.0,
+            "max": self.max if self.max is not None else 0.0,
+        }
+
+    def to_dict(self):
+        return {
+            "window": self.recent.maxlen,
+            "alpha": self.alpha,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "ewma": self.ewma,
+            "min": self.min,
+            "max": self.max,
+            "recent": list(self.recent),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stat = cls(window=state.get("window", 100), alpha=state.get("alpha", 0.1))
+        stat.count = state.get("count", 0)
+        stat.mean = state.get("mean", 0.0)
+        stat.m2 = state.get("m2", 0.0)
+        stat.ewma = state.get("ewma")
+        stat.min = state.get("min")
+        stat.max = state.get("max")
+        stat.recent.extend(state.get("recent", []))
+        stat.window_sum = math.fsum(stat.recent)
+        return stat
+
+
+class ErrorMetricsAccumulator:
+    METRICS = ("mse", "mae", "rse")
+
+    def __init__(self, window=100, alpha=0.1):
+        """
+        Streaming accumulator for the MSE/MAE/RSE triple logged by the performance tracker.
+        """
+        self.window = window
+        self.alpha = alpha
+        self.stats = {name: RunningStat(window, alpha) for name in self.METRICS}
+
+    def update(self, mse, mae, rse):
+        self.stats["mse"].update(mse)
+        self.stats["mae"].update(mae)
+        self.stats["rse"].update(rse)
+
+    @property
+    def count(self):
+        return self.stats["mse"].count
+
+    def summary(self):
+        """
+        Averages in the legacy `avg_*` shape plus the full per-metric breakdown.
+        """
+        result = {f"avg_{name}": stat.mean for name, stat in self.stats.items()}
+        result.update({f"ewma_{name}": stat.summary()["ewma"] for name, stat in self.stats.items()})
+        result.update({f"window_avg_{name}": stat.window_mean for name, stat in self.stats.items()})
+        result["count"] = self.count
+        result["stats"] = {name: stat.summary() for name, stat in self.stats.items()}
+        return result
+
+    def to_dict(self):
+        return {name: stat.to_dict() for name, stat in self.stats.items()}
+
+    @classmethod
+    def from_dict(cls, state, window=100, alpha=0.1):
+        accumulator = cls(window, alpha)
+        for name in cls.METRICS:
+            if name in state:
+                accumulator.stats[name] = RunningStat.from_dict(state[name])
+        return accumulator
+
+
+def decode_float_array(values):
+    """
+    Accept either a JSON list of numbers or a base64 string of packed little-endian float64.
+    """
+    if isinstance(values, str):
+        return np.frombuffer(base64.b64decode(values), dtype="<f8").astype(np.float64)
+    return np.asarray(values, dtype=np.float64)
+
+
+def encode_float_array(values):
+    """
+    Inverse of decode_float_array: base64 string of the values packed as little-endian float64.
+    """
+    return base64.b64encode(np.ascontiguousarray(values, dtype="<f8").tobytes()).decode("ascii")
+
+
+def pack_prediction_sets(prediction_sets):
+    """
+    Flatten a list of {"y_true": [...], "y_pred": [...]} sets into two flat arrays plus lengths.
+    """
+    lengths = []
+    true_parts = []
+    pred_parts = []
+    for idx, item in enumerate(prediction_sets):
+        y_true = decode_float_array(item.get("y_true", []))
+        y_pred = decode_float_array(item.get("y_pred", []))
+        if y_true.size == 0 or y_true.size != y_pred.size:
+            raise ValueError(f"Invalid input at set {idx}: y_true and y_pred must have the same non-empty length")
+        true_parts.append(y_true)
+        pred_parts.append(y_pred)
+        lengths.append(y_true.size)
+
+    if not lengths:
+        raise ValueError("Invalid input: batch must contain at least one prediction set")
+    return np.concatenate(true_parts), np.concatenate(pred_parts), np.asarray(lengths, dtype=np.int64)
+
+
+def compute_error_metrics_batch(y_true, y_pred, lengths):
+    """
+    Compute MSE, MAE and RSE for many prediction sets in one vectorized pass.
+    :param y_true: Flat array of actual values for all sets, concatenated
+    :param y_pred: Flat array of predicted values, same layout as y_true
+    :param lengths: Number of values in each set
+    :return: Three float64 arrays (mse, mae, rse), one entry per set
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+
+    if y_true.shape != y_pred.shape or y_true.ndim != 1:
+        raise ValueError("Invalid input: y_true and y_pred must be flat arrays of the same length")
+    if lengths.size == 0 or np.any(lengths < 1) or lengths.sum() != y_true.size:
+        raise ValueError("Invalid input: lengths must be positive and sum to the number of values")
+
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    diff = y_true - y_pred
+    mse = np.add.reduceat(diff * diff, offsets) / lengths
+    mae = np.add.reduceat(np.abs(diff), offsets) / lengths
+
+    p = 1  # One predictor variable, matching the single-set RSE
+    dof = np.maximum(lengths - p, 1)
+    rse = np.where(lengths > 1, np.sqrt(mse * lengths / dof), 0.0)
+    return mse, mae, rse
@@ -4,20 +4,38 @@ import numpy as np
 import datetime
 import json
 import os
-from pymongo import MongoClient
+from db.mongo_registry import get_db
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+from db.write_buffer import get_write_buffer
+from ai.anomaly_detector import get_anomaly_detector
+from ai.ring_buffer import RingBuffer
+from db.rollups import attach_rollups
+from ai.error_metrics import (
+    ErrorMetricsAccumulator,
+    compute_error_metrics_batch,
+    decode_float_array,
+    encode_float_array,
+)
+
+# Evaluations kept in memory per tracker; older ones live only in MongoDB and the rollups
+HISTORY_SIZE = int(os.getenv("PERFORMANCE_HISTORY_SIZE", "10000"))
+HISTORY_COLUMNS = ("mse", "mae", "rse")
 
 class AIPerformanceTracker:
-    def __init__(self, mongo_uri="mongodb://localhost:27017/", db_name="teralynk_ai"):
+    def __init__(self, mongo_uri=None, db_name=None, stats_window=100, stats_alpha=0.1,
+                 history_size=HISTORY_SIZE):
         """
         Initialize AI performance tracker with MongoDB connection.
+        :param history_size: Evaluations kept in the in-memory history (oldest are overwritten)
+        :param stats_window: Number of recent evaluations used for the fixed-window averages
+        :param stats_alpha: Smoothing factor for the exponentially weighted averages
         """
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        self.db = get_db(db_name, mongo_uri)
         self.collection = self.db["ai_performance_logs"]
-        self.mse_history = []
-        self.mae_history = []
-        self.rse_history = []
+        self.log_buffer = attach_rollups(get_write_buffer(self.collection))
+        self.history = RingBuffer(history_size, len(HISTORY_COLUMNS))
+        self.error_stats = ErrorMetricsAccumulator(stats_window, stats_alpha)
+        self.anomaly_detector = get_anomaly_detector()
         self.rollback_path = "/Users/patrick/Projects/Teralynk/backend/src/ai/ai_model_state.json"
 
     def evaluate_predictions(self, y_true, y_pred):
@@ -36,9 +54,8 @@ class AIPerformanceTracker:
         p = 1  # One predictor variable
         rse = np.sqrt(mse * n / (n - p)) if n > 1 else 0  # Avoid division by zero
 
-        self.mse_history.append(mse)
-        self.mae_history.append(mae)
-        self.rse_history.append(rse)
+        self.history.append((mse, mae, rse))
+        self.error_stats.update(mse, mae, rse)
 
         # Log performance metrics in MongoDB
         self.log_performance(mse, mae, rse)
@@ -55,27 +72,93 @@ class AIPerformanceTracker:
             "mae": mae,
             "rse": rse
         }
-        self.collection.insert_one(log_entry)
+        self.log_buffer.put(log_entry)
+        self.anomaly_detector.observe(log_entry)
         print(f"📊 AI Performance Logged: {log_entry}")
 
-    def get_average_errors(self):
+    def evaluate_predictions_batch(self, y_true, y_pred, lengths):
         """
-        Retrieve the rolling average of error metrics.
+        Evaluate many prediction sets at once.
+        :param y_true: Flat array of actual values for all sets, concatenated
+        :param y_pred: Flat array of predicted values, same layout as y_true
+        :param lengths: Number of values in each set
+        :return: Arrays of MSE, MAE, RSE (one entry per set)
         """
-        return {
-            "avg_mse": np.mean(self.mse_history) if self.mse_history else 0,
-            "avg_mae": np.mean(self.mae_history) if self.mae_history else 0,
-            "avg_rse": np.mean(self.rse_history) if self.rse_history else 0,
-        }
+        mse, mae, rse = compute_error_metrics_batch(y_true, y_pred, lengths)
+
+        self.history.extend(np.column_stack((mse, mae, rse)))
+        for m, a, r in zip(mse.tolist(), mae.tolist(), rse.tolist()):
+            self.error_stats.update(m, a, r)
+
+        # Log all results through the write-behind buffer
+        self.log_performance_batch(mse, mae, rse)
+
+        return mse, mae, rse
+
+    def log_performance_batch(self, mse, mae, rse):
+        """
+        Store a batch of AI performance logs in MongoDB via the write-behind buffer.
+        """
+        timestamp = datetime.datetime.utcnow()
+        log_entries = [
+            {"timestamp": timestamp, "mse": m, "mae": a, "rse": r}
+            for m, a, r in zip(mse.tolist(), mae.tolist(), rse.tolist())
+        ]
+        self.log_buffer.put_many(log_entries)
+        self.anomaly_detector.observe_many(log_entries)
+        print(f"📊 AI Performance Batch Logged: {len(log_entries)} entries")
+
+    def get_average_errors(self):
+        """
+        Retrieve running, exponentially weighted and fixed-window averages of error metrics.
+        Served from the incremental accumulator, so the cost does not grow with history.
+        """
+        return self.error_stats.summary()
+
+    # Plain lists, as before the ring buffer: a copy the caller owns, not a view later appends overwrite
+    @property
+    def mse_history(self):
+        return self.history.last()[:, 0].tolist()
+
+    @property
+    def mae_history(self):
+        return self.history.last()[:, 1].tolist()
+
+    @property
+    def rse_history(self):
+        return self.history.last()[:, 2].tolist()
+
+    def history_summary(self, last=None):
+        """
+        Vectorized statistics over the retained history (or its newest `last` evaluations).
+        """
+        values = self.history.last(last)
+        if not len(values):
+            return {"count": 0}
+        percentiles = np.percentile(values, [50, 95, 99], axis=0)
+        summary = {"count": len(values)}
+        for i, metric in enumerate(HISTORY_COLUMNS):
+            column = values[:, i]
+            summary[metric] = {
+                "mean": float(column.mean()),
+                "std": float(column.std()),
+                "min": float(column.min()),
+                "max": float(column.max()),
+                "p50": float(percentiles[0, i]),
+                "p95": float(percentiles[1, i]),
+                "p99": float(percentiles[2, i]),
+            }
+        return summary
 
     def check_performance_threshold(self, threshold=0.05):
         """
         Check AI performance trends and trigger retraining if errors exceed threshold.
+        Uses the streaming detector's recent MSE level (EWMA over roughly the last 10 evaluations)
+        instead of re-reading logs from MongoDB.
         """
-        recent_logs = list(self.collection.find().sort("timestamp", -1).limit(10))
-        errors = [log["mse"] for log in recent_logs if "mse" in log]
+        level = self.anomaly_detector.level("mse")
 
-        if errors and np.mean(errors) > threshold:
+        if level is not None and level > threshold:
             print("🚨 High AI error detected! Adjusting AI parameters & retraining...")
             self.optimize_ai_model()
 
@@ -106,9 +189,10 @@ class AIPerformanceTracker:
         Save the AI's state before making changes to allow rollback.
         """
         ai_state = {
-            "mse_history": self.mse_history,
-            "mae_history": self.mae_history,
-            "rse_history": self.rse_history
+            # One copy of the retained rows (mse, mae, rse), packed as base64 float64
+            "history": encode_float_array(self.history.last()),
+            "history_columns": list(HISTORY_COLUMNS),
+            "error_stats": self.error_stats.to_dict()
         }
         with open(self.rollback_path, "w") as f:
             json.dump(ai_state, f)
@@ -121,9 +205,24 @@ class AIPerformanceTracker:
         if os.path.exists(self.rollback_path):
             with open(self.rollback_path, "r") as f:
                 ai_state = json.load(f)
-            self.mse_history = ai_state.get("mse_history", [])
-            self.mae_history = ai_state.get("mae_history", [])
-            self.rse_history = ai_state.get("rse_history", [])
+            if "history" in ai_state:
+                rows = decode_float_array(ai_state["history"]).reshape(-1, len(HISTORY_COLUMNS))
+            else:
+                # Older snapshots stored one JSON list per metric
+                rows = np.column_stack([
+                    np.asarray(ai_state.get(f"{metric}_history", []), dtype=np.float64)
+                    for metric in HISTORY_COLUMNS
+                ]).reshape(-1, len(HISTORY_COLUMNS))
+            self.history.clear()
+            self.history.extend(rows)
+            window, alpha = self.error_stats.window, self.error_stats.alpha
+            if "error_stats" in ai_state:
+                self.error_stats = ErrorMetricsAccumulator.from_dict(ai_state["error_stats"], window, alpha)
+            else:
+                # Older snapshots only carry the raw histories
+                self.error_stats = ErrorMetricsAccumulator(window, alpha)
+                for mse, mae, rse in rows.tolist():
+                    self.error_stats.update(mse, mae, rse)
             print("🔄 AI Model Reverted to Previous Stable State.")
 
     def store_ai_settings(self, settings):
@@ -134,7 +233,7 @@ class AIPerformanceTracker:
             json.dump(settings, f)
         print("⚙️ AI Settings Updated.")
 
-# Example Usage
+# Example Usage (imports are package-relative, so run from backend/src: python -m ai.performance_tracker)
 if __name__ == "__main__":
     ai_tracker = AIPerformanceTracker()
 
@@ -3,20 +3,37 @@ import numpy as np
 import datetime
 import json
 import os
-from pymongo import MongoClient
+from db.mongo_registry import get_db
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+from db.async_mongo import run_blocking
+from db.indexes import ensure_indexes
+from db.write_buffer import get_write_buffer
+from ai.anomaly_detector import get_anomaly_detector
+from ai.ring_buffer import RingBuffer
+from db.rollups import attach_rollups, get_rollups
+from ai.error_metrics import (
+    ErrorMetricsAccumulator,
+    compute_error_metrics_batch,
+    decode_float_array,
+    pack_prediction_sets,
+)
 
 app = FastAPI()
 
+# Evaluations kept in memory per tracker; older ones live only in MongoDB and the rollups
+HISTORY_SIZE = int(os.getenv("PERFORMANCE_HISTORY_SIZE", "10000"))
+HISTORY_COLUMNS = ("mse", "mae", "rse")
+
 class AIPerformanceTracker:
-    def __init__(self, mongo_uri="mongodb://localhost:27017/", db_name="teralynk_ai"):
+    def __init__(self, mongo_uri=None, db_name=None, stats_window=100, stats_alpha=0.1,
+                 history_size=HISTORY_SIZE):
         """Initialize AI performance tracker with MongoDB connection."""
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        self.db = get_db(db_name, mongo_uri)
         self.collection = self.db["ai_performance_logs"]
-        self.mse_history = []
-        self.mae_history = []
-        self.rse_history = []
+        self.log_buffer = attach_rollups(get_write_buffer(self.collection))
+        self.history = RingBuffer(history_size, len(HISTORY_COLUMNS))
+        self.error_stats = ErrorMetricsAccumulator(stats_window, stats_alpha)
+        self.anomaly_detector = get_anomaly_detector()
         self.rollback_path = "/Users/patrick/Projects/Teralynk/backend/src/ai/ai_model_state.json"
 
     def evaluate_predictions(self, y_true, y_pred):
@@ -30,9 +47,8 @@ class AIPerformanceTracker:
         p = 1  # One predictor variable
         rse = np.sqrt(mse * n / (n - p)) if n > 1 else 0  # Avoid division by zero
 
-        self.mse_history.append(mse)
-        self.mae_history.append(mae)
-        self.rse_history.append(rse)
+        self.history.append((mse, mae, rse))
+        self.error_stats.update(mse, mae, rse)
 
         # Log performance metrics in MongoDB
         self.log_performance(mse, mae, rse)
@@ -47,9 +63,51 @@ class AIPerformanceTracker:
             "mae": mae,
             "rse": rse
         }
-        self.collection.insert_one(log_entry)
+        self.log_buffer.put(log_entry)
+        self.anomaly_detector.observe(log_entry)
         return log_entry
 
+    def evaluate_predictions_batch(self, y_true, y_pred, lengths):
+        """Evaluate many prediction sets in one vectorized pass (flat y_true/y_pred split by lengths)."""
+        mse, mae, rse = compute_error_metrics_batch(y_true, y_pred, lengths)
+
+        self.history.extend(np.column_stack((mse, mae, rse)))
+        for m, a, r in zip(mse.tolist(), mae.tolist(), rse.tolist()):
+            self.error_stats.update(m, a, r)
+
+        # Log all results through the write-behind buffer
+        self.log_performance_batch(mse, mae, rse)
+
+        return mse, mae, rse
+
+    def log_performance_batch(self, mse, mae, rse):
+        """Store a batch of AI performance logs in MongoDB via the write-behind buffer."""
+        timestamp = datetime.datetime.utcnow()
+        log_entries = [
+            {"timestamp": timestamp, "mse": m, "mae": a, "rse": r}
+            for m, a, r in zip(mse.tolist(), mae.tolist(), rse.tolist())
+        ]
+        self.log_buffer.put_many(log_entries)
+        self.anomaly_detector.observe_many(log_entries)
+        return log_entries
+
+    def get_average_errors(self):
+        """Retrieve running, exponentially weighted and fixed-window averages of error metrics."""
+        return self.error_stats.summary()
+
+    # Plain lists, as before the ring buffer: a copy the caller owns, not a view later appends overwrite
+    @property
+    def mse_history(self):
+        return self.history.last()[:, 0].tolist()
+
+    @property
+    def mae_history(self):
+        return self.history.last()[:, 1].tolist()
+
+    @property
+    def rse_history(self):
+        return self.history.last()[:, 2].tolist()
+
 ai_tracker = AIPerformanceTracker()
 
 @app.post("/evaluate")
@@ -63,11 +121,61 @@ def evaluate_performance(data: dict):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/evaluate/batch")
+def evaluate_performance_batch(data: dict):
+    """
+    API Endpoint: Evaluate many prediction sets in one request.
+    Accepts either {"batch": [{"y_true": [...], "y_pred": [...]}, ...]} or packed arrays
+    {"y_true": [...], "y_pred": [...], "lengths": [...]}, where y_true/y_pred may also be
+    base64-encoded little-endian float64 buffers.
+    """
+    try:
+        if "batch" in data:
+            y_true, y_pred, lengths = pack_prediction_sets(data["batch"])
+        else:
+            y_true = decode_float_array(data.get("y_true", []))
+            y_pred = decode_float_array(data.get("y_pred", []))
+            lengths = data.get("lengths") or [len(y_true)]
+        mse, mae, rse = ai_tracker.evaluate_predictions_batch(y_true, y_pred, lengths)
+        return {"count": len(mse), "mse": mse.tolist(), "mae": mae.tolist(), "rse": rse.tolist()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/average-errors")
 def get_avg_errors():
-    """API Endpoint: Get rolling average of errors"""
+    """API Endpoint: Get running, EWMA and fixed-window averages of errors"""
     return ai_tracker.get_average_errors()
 
+@app.get("/rollups")
+def get_metric_rollups(start: str, end: str = None, metric: str = "mse", series: bool = False):
+    """
+    API Endpoint: Metric summary (or per-bucket series) over a time range, served from rollup buckets
+    """
+    try:
+        start_time = datetime.datetime.fromisoformat(start)
+        end_time = datetime.datetime.fromisoformat(end) if end else datetime.datetime.utcnow()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if metric not in ("mse", "mae", "rse"):
+        raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+
+    rollups = get_rollups(ai_tracker.db)
+    if series:
+        return rollups.series(start_time, end_time, metric)
+    summary = rollups.query(start_time, end_time, metric)
+    summary["quantiles"] = {str(q): v for q, v in summary["quantiles"].items()}
+    return summary
+
+@app.on_event("startup")
+async def apply_indexes():
+    """Create the declared MongoDB indexes (idempotent)."""
+    await run_blocking(ensure_indexes, ai_tracker.db)
+
+@app.on_event("shutdown")
+async def flush_performance_logs():
+    """Write out any buffered performance logs before the worker exits."""
+    await run_blocking(ai_tracker.log_buffer.close)
+
 @app.get("/")
 def home():
     return {"message": "AI Performance Tracker API is running"}
@@ -0,0 +1,62 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/ring_buffer.py
+
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity, columns=1, dtype=np.float64):
+        """
+        Fixed-capacity FIFO of numeric rows backed by one preallocated NumPy array.
+        Appends overwrite the oldest rows once full; nothing is reallocated.
+        :param capacity: Maximum number of rows kept
+        :param columns: Values per row
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.data = np.zeros((capacity, columns), dtype=dtype)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        end = (self.start + self.size) % self.capacity
+        self.data[end] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def extend(self, rows):
+        """
+        Append many rows with at most two slice assignments.
+        """
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape(-1, self.data.shape[1])
+        if len(rows) >= self.capacity:
+            self.data[:] = rows[-self.capacity:]
+            self.start, self.size = 0, self.capacity
+            return
+        end = (self.start + self.size) % self.capacity
+        first = min(len(rows), self.capacity - end)
+        self.data[end:end + first] = rows[:first]
+        self.data[:len(rows) - first] = rows[first:]
+        overflow = max(self.size + len(rows) - self.capacity, 0)
+        self.size = min(self.size + len(rows), self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+
+    def last(self, n=None):
+        """
+        The newest `n` rows (all rows if None) in insertion order, oldest first.
+        Returns a view when the rows are contiguous, otherwise a copy.
+        """
+        n = self.size if n is None else min(n, self.size)
+        begin = (self.start + self.size - n) % self.capacity
+        if begin + n <= self.capacity:
+            return self.data[begin:begin + n]
+        return np.concatenate((self.data[begin:], self.data[:begin + n - self.capacity]))
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
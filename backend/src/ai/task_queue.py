@@ -0,0 +1,183 @@
+# /Users/patrick/Projects/Teralynk/backend/src/ai/task_queue.py
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+# "thread": run tasks on a bounded in-process worker pool; "inline": run them immediately
+TASK_QUEUE_BACKEND = os.getenv("TASK_QUEUE_BACKEND", "thread")
+TASK_QUEUE_WORKERS = int(os.getenv("TASK_QUEUE_WORKERS", "4"))
+
+_STOP = object()
+
+
+class TaskQueue:
+    def __init__(self, max_workers=4, dedup_window=30.0, max_queue_size=10000, name="tasks"):
+        """
+        In-process background job queue with per-key deduplication and bounded concurrency.
+        :param max_workers: Worker threads, i.e. the most tasks running at once
+        :param dedup_window: Seconds after a keyed task starts during which the same key is skipped
+        :param max_queue_size: Upper bound on queued tasks; when full, tasks run on the caller's thread
+        """
+        self.max_workers = max_workers
+        self.dedup_window = dedup_window
+        self.name = name
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "inline": 0}
+        self._lock = threading.Lock()
+        self._queued_keys = set()
+        self._last_started = {}
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"{name}-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, func, *args, key=None, dedup_window=None):
+        """
+        Queue `func(*args)`. A task with a `key` is skipped (returns False) while another task with
+        that key is still queued, or while the key's last run started less than `dedup_window` ago.
+        """
+        window = self.dedup_window if dedup_window is None else dedup_window
+        with self._lock:
+            if key is not None:
+                if key in self._queued_keys or time.monotonic() - self._last_started.get(key, -window) < window:
+                    self.stats["deduplicated"] += 1
+                    return False
+                self._queued_keys.add(key)
+            self.stats["submitted"] += 1
+            closed = self._closed
+
+        if not closed:
+            try:
+                self.queue.put_nowait((key, func, args))
+                return True
+            except queue.Full:
+                pass
+
+        # Closed or saturated: do the work here rather than lose it
+        with self._lock:
+            self._queued_keys.discard(key)
+            self.stats["inline"] += 1
+        self._execute(key, func, args)
+        return True
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    def flush(self):
+        """
+        Block until every queued task has finished.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Finish the queued tasks and stop the workers.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._workers:
+            self.queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                key, func, args = item
+                with self._lock:
+                    self._queued_keys.discard(key)
+                self._execute(key, func, args)
+            finally:
+                self.queue.task_done()
+
+    def _execute(self, key, func, args):
+        if key is not None:
+            with self._lock:
+                now = time.monotonic()
+                self._last_started[key] = now
+                if len(self._last_started) > 10000:
+                    self._prune(now)
+        try:
+            func(*args)
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ Background task {getattr(func, '__name__', func)} failed: {e}")
+
+    def _prune(self, now):
+        horizon = now - self.dedup_window
+        self._last_started = {k: t for k, t in self._last_started.items() if t >= horizon}
+
+
+class InlineTaskQueue:
+    def __init__(self, name="tasks", **options):
+        """
+        Same interface as TaskQueue, but every task runs synchronously on submit.
+        Useful for scripts and debugging; no deduplication is applied.
+        """
+        self.name = name
+        self.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "inline": 0}
+        self.depth = 0
+
+    def submit(self, func, *args, key=None, dedup_window=None):
+        self.stats["submitted"] += 1
+        self.stats["inline"] += 1
+        try:
+            func(*args)
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ Task {getattr(func, '__name__', func)} failed: {e}")
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+BACKENDS = {"thread": TaskQueue, "inline": InlineTaskQueue}
+
+# One queue per name so every module in the process shares the same workers
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_task_queue(name="analysis", backend=None, **options):
+    """
+    Return the process-wide task queue with this name, creating it on first use.
+    """
+    with _queues_lock:
+        task_queue = _queues.get(name)
+        if task_queue is None:
+            options.setdefault("max_workers", TASK_QUEUE_WORKERS)
+            task_queue = BACKENDS[backend or TASK_QUEUE_BACKEND](name=name, **options)
+            _queues[name] = task_queue
+        return task_queue
+
+
+def close_all_task_queues():
+    """
+    Finish queued tasks and stop every task queue. Registered with atexit.
+    """
+    with _queues_lock:
+        task_queues = list(_queues.values())
+        _queues.clear()
+    for task_queue in task_queues:
+        task_queue.close()
+
+
+atexit.register(close_all_task_queues)
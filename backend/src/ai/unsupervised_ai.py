@@ -3,21 +3,39 @@
 import numpy as np
 import datetime
 import openai
-from pymongo import MongoClient
-from sklearn.cluster import KMeans
+from db.mongo_registry import get_db
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+from db.write_buffer import get_write_buffer
+from db.rollups import attach_rollups
+from ai.behavior_clustering import BehaviorClusterEngine
+from ai.task_queue import get_task_queue
+from ai.anomaly_detector import get_anomaly_detector
+from collections import defaultdict
+import threading
 import random
 import os
 
+# "online": update the user's clusters on every evaluation.
+# "batch": only read the label written by `python -m ai.behavior_clustering_job`.
+BEHAVIOR_CLUSTERING_MODE = os.getenv("BEHAVIOR_CLUSTERING_MODE", "online")
+
 class UnsupervisedAI:
-    def __init__(self, mongo_uri="mongodb://localhost:27017/", db_name="teralynk_ai"):
+    def __init__(self, mongo_uri=None, db_name=None, clustering_mode=None):
         """
         Initialize Unsupervised AI with MongoDB and API access for ChatGPT queries.
+        :param clustering_mode: "online" or "batch" (defaults to BEHAVIOR_CLUSTERING_MODE)
         """
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        self.db = get_db(db_name, mongo_uri)
         self.collection = self.db["ai_performance_logs"]
+        self.log_buffer = attach_rollups(get_write_buffer(self.collection))
         self.user_profiles = self.db["user_profiles"]
+        self.behavior_clusters = BehaviorClusterEngine(self.collection, self.user_profiles)
+        self.clustering_mode = clustering_mode or BEHAVIOR_CLUSTERING_MODE
+        # Post-evaluation analysis runs in the background; points wait here until their user's job runs
+        self.analysis_queue = get_task_queue("analysis")
+        self.anomaly_detector = get_anomaly_detector()
+        self.pending_points = defaultdict(list)
+        self._pending_lock = threading.Lock()
         self.global_optimizations = self.db["global_optimizations"]
         self.chatgpt_queries = self.db["chatgpt_queries"]
         self.mse_history = []
@@ -46,39 +64,72 @@ class UnsupervisedAI:
             "mae": mae,
             "code_version": self.code_version
         }
-        self.collection.insert_one(log_entry)
+        self.log_buffer.put(log_entry)
+        self.anomaly_detector.observe(log_entry, user_id)
         print(f"📊 AI Performance Logged: {log_entry}")
 
-        self.analyze_user_behavior(user_id)
-        self.self_optimize_code(user_id)
+        self.schedule_analysis(user_id, mse, mae, log_entry["timestamp"])
 
         return mse, mae
 
-    def analyze_user_behavior(self, user_id):
+    def schedule_analysis(self, user_id, mse, mae, timestamp=None):
+        """
+        Queue behavior clustering and self-optimization for this user instead of running them inline.
+        Clustering jobs coalesce while queued (no point is lost); self-optimization runs at most
+        once per user per dedup window.
+        :param timestamp: Time of the evaluation that produced (mse, mae)
+        """
+        with self._pending_lock:
+            self.pending_points[user_id].append((mse, mae))
+        self.analysis_queue.submit(self.run_behavior_analysis, user_id,
+                                   key=("behavior", self.db.name, user_id), dedup_window=0)
+        self.analysis_queue.submit(self.self_optimize_code, user_id, mse, timestamp,
+                                   key=("optimize", self.db.name, user_id))
+
+    def run_behavior_analysis(self, user_id):
+        """
+        Background job: fold every point queued for the user into their behavior clusters.
+        """
+        with self._pending_lock:
+            points = self.pending_points.pop(user_id, [])
+        if self.clustering_mode == "batch" and points:
+            points = points[-1:]  # Only the precomputed label is read
+        for mse, mae in points:
+            self.analyze_user_behavior(user_id, mse, mae)
+
+    def analyze_user_behavior(self, user_id, mse, mae):
         """
         Perform unsupervised clustering to detect behavior patterns.
+        The user's centroids are updated incrementally with the new (mse, mae) point
+        and fully refitted from recent history every `refit_interval` evaluations.
+        In batch mode the label precomputed by the clustering job is read instead.
         """
-        user_logs = list(self.collection.find({"user_id": user_id}))
-        if len(user_logs) < 5:
+        if self.clustering_mode == "batch":
+            profile = self.user_profiles.find_one({"user_id": user_id}, {"behavior_cluster": 1}) or {}
+            cluster_label = profile.get("behavior_cluster")
+        else:
+            cluster_label = self.behavior_clusters.update(user_id, mse, mae)
+        if cluster_label is None:
             return  # Not enough data for clustering
 
-        errors = np.array([[log["mse"], log["mae"]] for log in user_logs])
-        kmeans = KMeans(n_clusters=3, random_state=42).fit(errors)
-        cluster_label = kmeans.predict([[errors[-1][0], errors[-1][1]]])[0]
-
-        self.user_profiles.update_one(
-            {"user_id": user_id},
-            {"$set": {"behavior_cluster": cluster_label}},
-            upsert=True
-        )
         print(f"🔍 User {user_id} categorized in cluster {cluster_label}")
 
-    def self_optimize_code(self, user_id):
+    def self_optimize_code(self, user_id, latest_mse=None, before=None):
         """
         AI dynamically generates and updates its own code for user-specific optimization.
+        :param latest_mse: MSE of the evaluation that queued this job (may not be flushed to the database yet)
+        :param before: Timestamp of that evaluation; only older logs are read back
         """
-        recent_logs = list(self.collection.find({"user_id": user_id}).sort("timestamp", -1).limit(10))
-        mse_values = [log["mse"] for log in recent_logs if "mse" in log]
+        query = {"user_id": user_id}
+        mse_values = []
+        if latest_mse is not None:
+            mse_values.append(latest_mse)
+            if before is not None:
+                query["timestamp"] = {"$lt": before}
+        recent_logs = list(self.collection.find(query).sort("timestamp", -1).limit(10 - len(mse_values)))
+        mse_values += [log["mse"] for log in recent_logs if "mse" in log]
+        if not mse_values:
+            return  # Nothing logged for this user yet
 
         if np.mean(mse_values) > 0.05:
             print("🚨 High AI error detected! Generating optimized AI code...")
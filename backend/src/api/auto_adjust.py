@@ -1,41 +1,39 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/auto_adjust.py
 
-from pymongo import MongoClient
-import numpy as np
+from db.mongo_registry import get_collection
+from api.trend_analysis import current_trends, short_term_slopes
 import datetime
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-performance_logs = db["ai_performance_logs"]
-suggestions_collection = db["ai_suggestions"]
-adjustments_collection = db["ai_adjustments"]
+# MongoDB Collections (shared, lazily connected pool)
+performance_logs = get_collection("ai_performance_logs")
+suggestions_collection = get_collection("ai_suggestions")
+adjustments_collection = get_collection("ai_adjustments")
 
 def analyze_and_adjust_ai():
     """
     Analyze AI performance trends and auto-adjust settings if necessary.
     """
-    logs = list(performance_logs.find().sort("timestamp", -1).limit(50))
+    trends = current_trends()
+    slopes = short_term_slopes(trends)
 
-    if len(logs) < 10:
+    if slopes is None:
         return "Not enough data to auto-adjust AI."
 
-    mse_values = np.array([log["mse"] for log in logs])
-    mae_values = np.array([log["mae"] for log in logs])
-    
-    mse_trend = np.polyfit(range(len(mse_values)), mse_values, 1)[0]
-    mae_trend = np.polyfit(range(len(mae_values)), mae_values, 1)[0]
+    mse_trend, mae_trend = slopes
+    mse_shift = trends["change_points"]["mse"]
 
     adjustment = "No adjustments needed."
     
     if mse_trend > 0.01 or mae_trend > 0.01:
         adjustment = "Reducing AI learning rate to improve accuracy."
         # Apply adjustment logic here
+    elif mse_shift["detected"] and mse_shift["shift"] > 0:
+        adjustment = "Sudden MSE increase detected. Reducing AI learning rate to improve accuracy."
 
     adjustment_entry = {
         "timestamp": datetime.datetime.utcnow(),
-        "adjustment": adjustment
+        "adjustment": adjustment,
+        "trends": trends
     }
     adjustments_collection.insert_one(adjustment_entry)
 
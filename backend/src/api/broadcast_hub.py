@@ -0,0 +1,107 @@
+# /Users/patrick/Projects/Teralynk/backend/src/api/broadcast_hub.py
+
+import asyncio
+import json
+
+
+class Subscription:
+    def __init__(self, topic, max_queue_size):
+        """
+        One client's bounded outbox for a topic.
+        """
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.lagged = False
+
+    async def get(self):
+        return await self.queue.get()
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+
+class BroadcastHub:
+    def __init__(self, max_queue_size=32, policy="drop_oldest"):
+        """
+        Topic-based fan-out for websocket clients.
+        Each message is serialized once and queued for every subscriber of its topic.
+        :param max_queue_size: Per-client queue bound
+        :param policy: What to do when a client's queue is full:
+                       "drop_oldest" discards the oldest queued message,
+                       "coalesce" discards everything queued and keeps only the newest
+        """
+        if policy not in ("drop_oldest", "coalesce"):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.topic_policies = {}
+        self.subscribers = {}
+        self.published = {}
+
+    def set_policy(self, topic, policy):
+        """
+        Override the overflow policy for a single topic.
+        """
+        if policy not in ("drop_oldest", "coalesce"):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.topic_policies[topic] = policy
+
+    def subscribe(self, topic):
+        subscription = Subscription(topic, self.max_queue_size)
+        self.subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.get(subscription.topic, set()).discard(subscription)
+
+    def has_subscribers(self, topic):
+        """
+        Lets producers skip serializing messages nobody will receive.
+        """
+        return bool(self.subscribers.get(topic))
+
+    def publish(self, topic, message):
+        """
+        Serialize a message once and fan it out to every subscriber of the topic.
+        Must be called from the event loop thread. Returns the number of subscribers reached.
+        """
+        payload = message if isinstance(message, (str, bytes)) else json.dumps(message)
+        policy = self.topic_policies.get(topic, self.policy)
+        subscribers = self.subscribers.get(topic, ())
+        for subscription in subscribers:
+            self._offer(subscription, payload, policy)
+        self.published[topic] = self.published.get(topic, 0) + 1
+        return len(subscribers)
+
+    def _offer(self, subscription, payload, policy):
+        queue = subscription.queue
+        if queue.full():
+            subscription.lagged = True
+            if policy == "coalesce":
+                while not queue.empty():
+                    queue.get_nowait()
+                    subscription.dropped += 1
+            else:
+                queue.get_nowait()
+                subscription.dropped += 1
+        queue.put_nowait(payload)
+
+    def metrics(self):
+        """
+        Subscriber counts, queue depths and drop counters per topic.
+        """
+        topics = {}
+        for topic in set(self.subscribers) | set(self.published):
+            subscribers = self.subscribers.get(topic, set())
+            depths = [s.depth for s in subscribers]
+            topics[topic] = {
+                "subscribers": len(subscribers),
+                "published": self.published.get(topic, 0),
+                "queue_depths": depths,
+                "max_queue_depth": max(depths, default=0),
+                "dropped": sum(s.dropped for s in subscribers),
+                "lagging_subscribers": sum(1 for s in subscribers if s.lagged),
+            }
+        return {"max_queue_size": self.max_queue_size, "topics": topics}
@@ -0,0 +1,150 @@
+# /Users/patrick/Projects/Teralynk/backend/src/api/collection_feed.py
+
+import asyncio
+import datetime
+import threading
+from collections import deque
+from db.async_mongo import run_blocking
+
+# Newest-first ordering; _id breaks ties between entries written in the same batch
+RECENT_SORT = [("timestamp", -1), ("_id", -1)]
+
+# Upper bound on documents fetched per poll; a larger backlog is drained over several polls
+MAX_POLL_BATCH = 1000
+
+# Polling re-reads this far behind the newest document seen. `timestamp` is set when a log is
+# buffered, and another process's write-behind buffer may insert it a second or more later.
+POLL_OVERLAP_SECONDS = 5.0
+
+
+class CollectionFeed:
+    def __init__(self, collection, window=10, poll_interval=1.0, use_change_stream=True,
+                 poll_overlap=POLL_OVERLAP_SECONDS):
+        """
+        Single server-side producer of newly inserted documents for a collection.
+        Uses a MongoDB change stream when the server supports it and falls back to
+        polling with an overlapping timestamp cursor otherwise (standalone mongod, local mocks).
+        :param collection: pymongo collection to watch
+        :param window: Number of most recent documents kept in memory for snapshots
+        :param poll_interval: Seconds between polls in fallback mode
+        :param poll_overlap: Seconds behind the newest seen timestamp that each poll re-reads, so
+            documents inserted late (with an older timestamp) are still delivered, once
+        """
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+        self.poll_overlap = datetime.timedelta(seconds=poll_overlap)
+        self.recent = deque(maxlen=window)
+        self.listeners = []
+        self.mode = None
+        self._loop = None
+        self._task = None
+        self._stopped = threading.Event()
+        # Polling cursor: newest timestamp seen and the _ids delivered within the overlap window
+        self._newest = None
+        self._seen = {}
+
+    def add_listener(self, callback):
+        """
+        Register a callback invoked on the event loop with each list of new documents (oldest first).
+        """
+        self.listeners.append(callback)
+
+    def snapshot(self):
+        """
+        Most recent documents, newest first.
+        """
+        return list(reversed(self.recent))
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped.clear()
+        # The change stream is opened before the snapshot is read, so inserts landing in between
+        # are delivered by the stream instead of being lost
+        stream = None
+        if self.use_change_stream:
+            try:
+                stream = await run_blocking(self._open_stream)
+            except Exception as e:
+                print(f"⚠️ Change stream unavailable for {self.collection.name}, polling instead: {e}")
+        docs = await run_blocking(
+            lambda: list(self.collection.find().sort(RECENT_SORT).limit(self.recent.maxlen))
+        )
+        self.recent.extend(reversed(docs))
+        for doc in docs:
+            self._remember(doc)
+        self._task = asyncio.create_task(self._run(stream, {doc["_id"] for doc in docs}))
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, stream, snapshot_ids):
+        if stream is not None:
+            try:
+                self.mode = "change_stream"
+                await self._loop.run_in_executor(None, self._watch, stream, snapshot_ids)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Change stream failed for {self.collection.name}, polling instead: {e}")
+        self.mode = "polling"
+        await self._poll()
+
+    def _open_stream(self):
+        return self.collection.watch([{"$match": {"operationType": "insert"}}], max_await_time_ms=1000)
+
+    def _watch(self, stream, snapshot_ids):
+        # Runs in a worker thread; try_next lets us notice stop() between server waits.
+        # Inserts made while the snapshot was read show up in both: those are skipped here.
+        with stream:
+            while not self._stopped.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                doc = change["fullDocument"]
+                if doc.get("_id") in snapshot_ids:
+                    continue
+                self._loop.call_soon_threadsafe(self._publish, [doc])
+
+    async def _poll(self):
+        while not self._stopped.is_set():
+            docs = await run_blocking(self._fetch_since_last)
+            if docs:
+                self._publish(docs)
+            await asyncio.sleep(self.poll_interval)
+
+    def _fetch_since_last(self):
+        if self._newest is None:
+            docs = list(self.collection.find().sort(RECENT_SORT).limit(self.recent.maxlen))[::-1]
+        else:
+            cutoff = self._newest - self.poll_overlap
+            self._seen = {doc_id: timestamp for doc_id, timestamp in self._seen.items() if timestamp >= cutoff}
+            query = {"timestamp": {"$gte": cutoff}, "_id": {"$nin": list(self._seen)}}
+            docs = list(self.collection.find(query).sort([("timestamp", 1), ("_id", 1)]).limit(MAX_POLL_BATCH))
+        for doc in docs:
+            self._remember(doc)
+        return docs
+
+    def _remember(self, doc):
+        timestamp = doc.get("timestamp")
+        if timestamp is None:
+            return
+        self._seen[doc["_id"]] = timestamp
+        if self._newest is None or timestamp > self._newest:
+            self._newest = timestamp
+
+    def _publish(self, docs):
+        self.recent.extend(docs)
+        for callback in self.listeners:
+            try:
+                callback(docs)
+            except Exception as e:
+                print(f"❌ Feed listener failed for {self.collection.name}: {e}")
@@ -0,0 +1,166 @@
+# /Users/patrick/Projects/Teralynk/backend/src/api/columnar_export.py
+
+import json
+from db.async_mongo import run_blocking
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; NDJSON export works without it
+    pa = None
+    pq = None
+
+# Exportable collections and their column types (in output order)
+EXPORT_SCHEMAS = {
+    "ai_performance_logs": {
+        "_id": "string",
+        "timestamp": "timestamp",
+        "user_id": "string",
+        "mse": "float64",
+        "mae": "float64",
+        "rse": "float64",
+        "code_version": "string",
+    },
+    "ai_notifications": {
+        "_id": "string",
+        "timestamp": "timestamp",
+        "type": "string",
+        "update_details": "string",
+        "status": "string",
+    },
+}
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+DEFAULT_ROW_GROUP_SIZE = 50000
+MAX_ROW_GROUP_SIZE = 500000
+
+
+def available_formats():
+    return [name for name in FORMATS if name == "ndjson" or pa is not None]
+
+
+def select_fields(collection_name, fields=None):
+    """
+    Resolve the requested comma-separated field list against the collection's schema.
+    """
+    schema = EXPORT_SCHEMAS[collection_name]
+    if not fields:
+        return list(schema)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in schema]
+    if unknown:
+        raise ValueError(f"Unknown fields for {collection_name}: {', '.join(unknown)}")
+    return [f for f in schema if f in requested]
+
+
+def projection_for(fields):
+    projection = {field: 1 for field in fields}
+    if "_id" not in fields:
+        projection["_id"] = 0
+    return projection
+
+
+def arrow_schema(collection_name, fields):
+    types = {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("ms"),
+    }
+    schema = EXPORT_SCHEMAS[collection_name]
+    return pa.schema([(field, types[schema[field]]) for field in fields])
+
+
+def batch_to_table(docs, schema):
+    """
+    Convert one batch of documents into an Arrow table, column by column.
+    """
+    columns = []
+    for field in schema:
+        values = [doc.get(field.name) for doc in docs]
+        if field.name == "_id" or pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        columns.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class _ChunkSink:
+    def __init__(self):
+        """
+        Minimal writable file object that hands written bytes back to the caller
+        after each row group, so Arrow/Parquet writers can feed a streaming response.
+        """
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+async def stream_export(async_collection, collection_name, export_format, query, fields,
+                        row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Async generator of encoded export bytes. Each cursor batch of `row_group_size`
+    documents becomes one Parquet row group / Arrow record batch / block of NDJSON lines.
+    """
+    batches = async_collection.iter_batches(
+        query, projection_for(fields), sort=[("timestamp", 1)], batch_size=row_group_size
+    )
+
+    if export_format == "ndjson":
+        async for docs in batches:
+            lines = [json.dumps({f: doc.get(f) for f in fields}, default=str) for doc in docs]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+        return
+
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow and Parquet exports")
+
+    schema = arrow_schema(collection_name, fields)
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    def write_batch(docs):
+        table = batch_to_table(docs, schema)
+        if export_format == "parquet":
+            writer.write_table(table, row_group_size=row_group_size)
+        else:
+            writer.write_table(table)
+        return sink.drain()
+
+    async for docs in batches:
+        # Column conversion and encoding are CPU-bound, keep them off the event loop
+        data = await run_blocking(write_batch, docs)
+        if data:
+            yield data
+
+    writer.close()
+    yield sink.drain()
@@ -1,39 +1,145 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/log_export.py
 
-from fastapi import FastAPI, Response
-from pymongo import MongoClient
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from db.async_mongo import get_async_collection, run_blocking
+from db.indexes import ensure_indexes
+from api.logs_api import parse_time
+from api.columnar_export import (
+    DEFAULT_ROW_GROUP_SIZE,
+    FORMATS,
+    MAX_ROW_GROUP_SIZE,
+    available_formats,
+    select_fields,
+    stream_export,
+)
 import csv
 import io
+import zlib
 
 app = FastAPI()
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-notifications_collection = db["ai_notifications"]
+# MongoDB Collections (shared, lazily connected pool)
+notifications_collection = get_async_collection("ai_notifications")
+performance_logs = get_async_collection("ai_performance_logs")
 
-@app.get("/api/export_logs")
-def export_logs():
+# Bulk-exportable datasets: URL name -> (collection name, async collection)
+EXPORT_DATASETS = {
+    "performance": ("ai_performance_logs", performance_logs),
+    "notifications": ("ai_notifications", notifications_collection),
+}
+
+# Rows fetched from the cursor (and written as one CSV chunk) per round trip
+EXPORT_BATCH_SIZE = 1000
+CSV_HEADER = ["Timestamp", "Type", "Details", "Status"]
+
+def build_export_query(since=None, until=None, type=None):
+    query = {}
+    time_range = {}
+    since_time = parse_time(since, "since")
+    until_time = parse_time(until, "until")
+    if since_time:
+        time_range["$gte"] = since_time
+    if until_time:
+        time_range["$lt"] = until_time
+    if time_range:
+        query["timestamp"] = time_range
+    if type:
+        query["type"] = type
+    return query
+
+async def generate_csv_chunks(query):
     """
-    Export AI logs as a CSV file.
+    Yield the CSV header and then one encoded chunk per cursor batch.
     """
-    logs = list(notifications_collection.find().sort("timestamp", -1))
-    
     output = io.StringIO()
     csv_writer = csv.writer(output)
-    csv_writer.writerow(["Timestamp", "Type", "Details", "Status"])
-    
-    for log in logs:
-        csv_writer.writerow([
-            log["timestamp"],
-            log["type"],
-            log["update_details"],
-            log["status"]
-        ])
-
-    response = Response(output.getvalue(), media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=ai_logs.csv"
+    csv_writer.writerow(CSV_HEADER)
+    yield output.getvalue().encode("utf-8")
+
+    async for logs in notifications_collection.iter_batches(
+        query, sort=[("timestamp", -1)], batch_size=EXPORT_BATCH_SIZE
+    ):
+        output.seek(0)
+        output.truncate(0)
+        for log in logs:
+            csv_writer.writerow([
+                log.get("timestamp", ""),
+                log.get("type", ""),
+                log.get("update_details", ""),
+                log.get("status", "")
+            ])
+        yield output.getvalue().encode("utf-8")
+
+async def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@app.on_event("startup")
+async def apply_indexes():
+    """
+    Create the declared MongoDB indexes (idempotent).
+    """
+    await run_blocking(ensure_indexes)
+
+@app.get("/api/export_logs")
+async def export_logs(since: str = None, until: str = None, type: str = None, gzip: bool = False):
+    """
+    Export AI logs as a CSV file, streamed batch by batch so memory stays constant.
+    :param since: Only logs at or after this ISO timestamp
+    :param until: Only logs before this ISO timestamp
+    :param type: Only logs of this notification type
+    :param gzip: Compress the download (ai_logs.csv.gz)
+    """
+    chunks = generate_csv_chunks(build_export_query(since, until, type))
+    filename = "ai_logs.csv"
+    media_type = "text/csv"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    response = StreamingResponse(chunks, media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+@app.get("/api/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "parquet",
+    since: str = None,
+    until: str = None,
+    fields: str = None,
+    row_group_size: int = Query(DEFAULT_ROW_GROUP_SIZE, ge=1, le=MAX_ROW_GROUP_SIZE),
+):
+    """
+    Bulk export of performance logs or notifications for offline analysis.
+    Streams Parquet (default), Arrow IPC or NDJSON in bounded row groups, oldest first.
+    :param dataset: "performance" or "notifications"
+    :param fields: Comma-separated subset of columns to export
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    if format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Available: {', '.join(available_formats())}")
+
+    collection_name, collection = EXPORT_DATASETS[dataset]
+    try:
+        selected = select_fields(collection_name, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = build_export_query(since, until)
+    media_type, extension = FORMATS[format]
+    response = StreamingResponse(
+        stream_export(collection, collection_name, format, query, selected, row_group_size),
+        media_type=media_type
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={collection_name}.{extension}"
     return response
 
 if __name__ == "__main__":
@@ -1,27 +1,118 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/logs_api.py
 
-from fastapi import FastAPI
-from pymongo import MongoClient
+from fastapi import FastAPI, HTTPException, Query
+from bson import ObjectId
+from bson.errors import InvalidId
+from db.async_mongo import get_async_collection, run_blocking
+from db.indexes import ensure_indexes
+import base64
+import datetime
 import json
 
 app = FastAPI()
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-notifications_collection = db["ai_notifications"]
+# MongoDB Collections (shared, lazily connected pool)
+notifications_collection = get_async_collection("ai_notifications")
+
+# Paging limits and the fields the log page may ask for
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+LOG_FIELDS = ("timestamp", "type", "update_details", "status")
+
+def encode_cursor(log):
+    """
+    Opaque keyset cursor for the position just after `log` in (timestamp desc, _id desc) order.
+    """
+    raw = f"{log['timestamp'].isoformat()}|{log['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, object_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except (ValueError, InvalidId) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+def parse_time(value, name):
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected ISO 8601 timestamp")
+
+def build_projection(fields):
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LOG_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # _id and timestamp are always returned because the cursor is built from them
+    return {field: 1 for field in set(requested) | {"timestamp"}}
+
+@app.on_event("startup")
+async def apply_indexes():
+    """
+    Create the declared MongoDB indexes (idempotent).
+    """
+    await run_blocking(ensure_indexes)
 
 @app.get("/api/logs")
-def get_logs():
+async def get_logs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str = None,
+    type: str = None,
+    status: str = None,
+    since: str = None,
+    until: str = None,
+    fields: str = None,
+):
     """
-    Retrieve AI logs for the log page.
+    Retrieve one page of AI logs for the log page, newest first.
+    :param after: Cursor from a previous page's `next_cursor`
+    :param type: Only logs of this notification type
+    :param status: Only logs with this status
+    :param since: Only logs at or after this ISO timestamp
+    :param until: Only logs before this ISO timestamp
+    :param fields: Comma-separated subset of fields to return
     """
-    logs = list(notifications_collection.find().sort("timestamp", -1))
+    query = {}
+    if type:
+        query["type"] = type
+    if status:
+        query["status"] = status
+
+    time_range = {}
+    since_time = parse_time(since, "since")
+    until_time = parse_time(until, "until")
+    if since_time:
+        time_range["$gte"] = since_time
+    if until_time:
+        time_range["$lt"] = until_time
+    if time_range:
+        query["timestamp"] = time_range
+
+    if after:
+        timestamp, object_id = decode_cursor(after)
+        keyset = {"$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": object_id}},
+        ]}
+        query = {"$and": [query, keyset]} if query else keyset
+
+    # Fetch one extra row to know whether another page exists
+    logs = await notifications_collection.find(
+        query, build_projection(fields), sort=[("timestamp", -1), ("_id", -1)], limit=limit + 1
+    )
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    next_cursor = encode_cursor(logs[-1]) if has_more else None
+
     for log in logs:
         log["_id"] = str(log["_id"])  # Convert ObjectId to string
 
-    return {"logs": logs}
+    return {"logs": logs, "next_cursor": next_cursor, "has_more": has_more}
 
 if __name__ == "__main__":
     import uvicorn
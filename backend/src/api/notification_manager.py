@@ -2,15 +2,12 @@
 
 import smtplib
 import requests
-from pymongo import MongoClient
+from db.mongo_registry import get_collection
 import datetime
 import os
 
-# MongoDB Setup
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-notifications_collection = db["ai_notifications"]
+# MongoDB Collections (shared, lazily connected pool)
+notifications_collection = get_collection("ai_notifications")
 
 # Email & Slack Configuration
 SMTP_SERVER = "smtp.gmail.com"  # Change to your email provider
@@ -1,30 +1,29 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/performance_analyzer.py
 
-from pymongo import MongoClient
-import numpy as np
+from db.mongo_registry import get_collection
+from api.trend_analysis import current_trends, short_term_slopes
 import datetime
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-performance_logs = db["ai_performance_logs"]
-suggestions_collection = db["ai_suggestions"]
+# MongoDB Collections (shared, lazily connected pool)
+performance_logs = get_collection("ai_performance_logs")
+suggestions_collection = get_collection("ai_suggestions")
 
 def analyze_performance_trends():
     """
     Analyze historical AI performance trends and suggest improvements.
     """
-    logs = list(performance_logs.find().sort("timestamp", -1).limit(50))
+    trends = current_trends()
+    slopes = short_term_slopes(trends)
 
-    if len(logs) < 10:
+    if slopes is None:
         return "Not enough data to generate AI suggestions."
 
-    mse_values = np.array([log["mse"] for log in logs])
-    mae_values = np.array([log["mae"] for log in logs])
-    
-    mse_trend = np.polyfit(range(len(mse_values)), mse_values, 1)[0]
-    mae_trend = np.polyfit(range(len(mae_values)), mae_values, 1)[0]
+    mse_trend, mae_trend = slopes
+    long_window = max(trends["windows"], key=int)
+    long_term = trends["windows"][long_window]["mse"]
+    # Total change across the longest window, relative to its mean
+    long_drift = long_term["robust_slope"] * int(long_window) / (long_term["mean"] or 1.0)
+    mse_shift = trends["change_points"]["mse"]
 
     suggestion = "AI performance is stable. No major adjustments needed."
     
@@ -32,10 +31,16 @@ def analyze_performance_trends():
         suggestion = "Performance degradation detected. Recommend fine-tuning AI model weights."
     elif mse_trend < -0.01 or mae_trend < -0.01:
         suggestion = "Performance improving. Monitor for potential overfitting."
+    elif mse_shift["detected"]:
+        direction = "increase" if mse_shift["shift"] > 0 else "decrease"
+        suggestion = f"Sudden MSE {direction} detected {mse_shift['points_ago']} evaluations ago. Review recent model or data changes."
+    elif long_window != min(trends["windows"], key=int) and long_drift > 0.1:
+        suggestion = "Slow long-term MSE drift detected. Schedule a model retraining."
     
     suggestion_entry = {
         "timestamp": datetime.datetime.utcnow(),
-        "suggestion": suggestion
+        "suggestion": suggestion,
+        "trends": trends
     }
     suggestions_collection.insert_one(suggestion_entry)
     return suggestion
@@ -0,0 +1,191 @@
+# /Users/patrick/Projects/Teralynk/backend/src/api/trend_analysis.py
+
+import datetime
+import threading
+
+import numpy as np
+
+from ai.ring_buffer import RingBuffer
+from db.mongo_registry import get_collection
+
+TREND_METRICS = ("mse", "mae")
+TREND_WINDOWS = (50, 500, 5000)
+MIN_POINTS = 10
+# Each refresh re-reads this far behind the newest log seen: a log's timestamp is set when it is
+# buffered and another process's write-behind buffer may insert it a second or more later
+REFRESH_OVERLAP = datetime.timedelta(seconds=5)
+
+# A mean shift is reported when its standardized CUSUM statistic exceeds this
+CHANGE_POINT_THRESHOLD = 4.0
+
+
+def window_slopes(values):
+    """
+    Least-squares slope of each column against 0..n-1 (oldest first), in closed form:
+    sum((x - x̄) * y) / sum((x - x̄)^2).
+    """
+    n = len(values)
+    x = np.arange(n) - (n - 1) / 2.0
+    return x @ values / (x @ x)
+
+
+def robust_slopes(values):
+    """
+    Median-of-halves slope per column: (median of newer half - median of older half) / half length.
+    Insensitive to a minority of outliers, O(n) per column.
+    """
+    half = len(values) // 2
+    older = np.median(values[:half], axis=0)
+    newer = np.median(values[len(values) - half:], axis=0)
+    return (newer - older) / (len(values) - half)
+
+
+def change_points(values):
+    """
+    Most likely single mean shift per column via the standardized CUSUM statistic
+    sqrt(k(n-k)/n) * |mean(y[:k]) - mean(y[k:])| / sigma, with sigma estimated robustly
+    from first differences. All split points are evaluated at once from cumulative sums.
+    """
+    n = len(values)
+    k = np.arange(1, n)[:, None]
+    prefix = np.cumsum(values, axis=0)[:-1]
+    total = values.sum(axis=0)
+    mean_before = prefix / k
+    mean_after = (total - prefix) / (n - k)
+    diffs = np.diff(values, axis=0)
+    sigma = 1.4826 * np.median(np.abs(diffs - np.median(diffs, axis=0)), axis=0) / np.sqrt(2)
+    sigma = np.where(sigma > 0, sigma, np.std(values, axis=0) + 1e-12)
+    stat = np.sqrt(k * (n - k) / n) * np.abs(mean_after - mean_before) / sigma
+
+    best = np.argmax(stat, axis=0)
+    columns = np.arange(values.shape[1])
+    return {
+        "index": best + 1,
+        "score": stat[best, columns],
+        "shift": (mean_after - mean_before)[best, columns],
+    }
+
+
+class TrendEngine:
+    def __init__(self, collection=None, windows=TREND_WINDOWS, metrics=TREND_METRICS):
+        """
+        Multi-window trend detection over the most recent performance logs.
+        Points live in a ring buffer sized to the largest window and are added incrementally,
+        so each refresh reads only the logs written since the previous one.
+        """
+        self.collection = collection if collection is not None else get_collection("ai_performance_logs")
+        self.windows = tuple(sorted(windows))
+        self.metrics = tuple(metrics)
+        self.buffer = RingBuffer(self.windows[-1], len(self.metrics))
+        self.newest = None  # timestamp of the newest point seen
+        self._seen = {}  # _id -> timestamp of the points within REFRESH_OVERLAP of `newest`
+        self._lock = threading.Lock()
+        # Held for a whole refresh (read the cursor, query, append) so concurrent refreshes
+        # cannot fetch the same range twice; analyze() only needs _lock and is not blocked
+        self._refresh_lock = threading.Lock()
+
+    def add(self, logs):
+        """
+        Feed logs (oldest first). Logs missing a metric are skipped.
+        """
+        rows = [[log[m] for m in self.metrics] for log in logs if all(log.get(m) is not None for m in self.metrics)]
+        with self._lock:
+            if rows:
+                self.buffer.extend(rows)
+            for log in logs:
+                timestamp = log.get("timestamp")
+                if timestamp is None:
+                    continue
+                if log.get("_id") is not None:
+                    self._seen[log["_id"]] = timestamp
+                if self.newest is None or timestamp > self.newest:
+                    self.newest = timestamp
+
+    def refresh(self):
+        """
+        Pull logs not seen yet, at most one buffer's worth. Logs from REFRESH_OVERLAP behind the newest
+        one are read again, so late inserts are picked up; those already added are skipped by _id.
+        """
+        with self._refresh_lock:
+            with self._lock:
+                query = {}
+                if self.newest is not None:
+                    cutoff = self.newest - REFRESH_OVERLAP
+                    self._seen = {doc_id: ts for doc_id, ts in self._seen.items() if ts >= cutoff}
+                    query = {"timestamp": {"$gte": cutoff}, "_id": {"$nin": list(self._seen)}}
+            projection = {"timestamp": 1, **{m: 1 for m in self.metrics}}
+            logs = list(self.collection.find(query, projection)
+                        .sort([("timestamp", -1), ("_id", -1)]).limit(self.buffer.capacity))
+            logs.reverse()
+            self.add(logs)
+            return len(logs)
+
+    def analyze(self):
+        """
+        Slopes (least squares and robust) and mean for every window that has enough points,
+        plus the strongest change point over the whole buffer. Slopes are per log, oldest to newest,
+        so a positive slope means the metric is getting worse.
+        """
+        with self._lock:
+            values = np.array(self.buffer.last(), copy=True)
+
+        result = {"count": len(values), "windows": {}, "change_points": {}}
+        if len(values) < MIN_POINTS:
+            return result
+
+        for window in self.windows:
+            # The shortest window accepts a partial fill; longer ones need to be full
+            if len(values) < window and window != self.windows[0]:
+                continue
+            recent = values[-window:]
+            slopes, robust, means = window_slopes(recent), robust_slopes(recent), recent.mean(axis=0)
+            result["windows"][str(window)] = {
+                metric: {"slope": float(slopes[i]), "robust_slope": float(robust[i]), "mean": float(means[i])}
+                for i, metric in enumerate(self.metrics)
+            }
+
+        points = change_points(values)
+        for i, metric in enumerate(self.metrics):
+            score = float(points["score"][i])
+            result["change_points"][metric] = {
+                "detected": score > CHANGE_POINT_THRESHOLD,
+                "score": score,
+                "shift": float(points["shift"][i]),
+                "points_ago": int(len(values) - points["index"][i]),
+            }
+        return result
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_trend_engine():
+    """
+    Process-wide trend engine shared by auto_adjust and performance_analyzer.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TrendEngine()
+        return _engine
+
+
+def current_trends():
+    """
+    Catch the shared engine up with new logs and return its analysis.
+    """
+    engine = get_trend_engine()
+    engine.refresh()
+    return engine.analyze()
+
+
+def short_term_slopes(trends):
+    """
+    (mse slope, mae slope) over the shortest window, or None without enough data.
+    """
+    windows = trends["windows"]
+    if not windows:
+        return None
+    shortest = windows[str(min(int(w) for w in windows))]
+    return shortest["mse"]["slope"], shortest["mae"]["slope"]
@@ -1,81 +1,216 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/websocket_server.py
 
 from fastapi import FastAPI, WebSocket
-from pymongo import MongoClient
+from db.async_mongo import get_async_collection, run_blocking
+from db.indexes import ensure_indexes
+from api.collection_feed import CollectionFeed
+from api.broadcast_hub import BroadcastHub
+from api.ws_protocol import (
+    ENCODINGS,
+    PERFORMANCE_METRICS,
+    WindowDiff,
+    encode_message,
+    negotiate,
+    notification_record,
+    performance_record,
+)
 import json
 import asyncio
 
 app = FastAPI()
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
+# Collections (shared, lazily connected pool)
+performance_logs = get_async_collection("ai_performance_logs")
+notifications_collection = get_async_collection("ai_notifications")
 
-# Collections
-performance_logs = db["ai_performance_logs"]
-notifications_collection = db["ai_notifications"]
+# Single producer of new performance logs shared by every /ws/performance client
+performance_feed = CollectionFeed(performance_logs.collection, window=10)
 
-# WebSocket Connections
-websocket_connections = {
-    "performance": [],
-    "notifications": []
-}
+# WebSocket Connections: one bounded outbox per client, grouped by topic.
+# Full-view topics only need the newest message, so slow clients are coalesced;
+# delta topics drop the backlog and the client is resynced from a fresh snapshot.
+websocket_hub = BroadcastHub(max_queue_size=16, policy="coalesce")
+for _encoding in ENCODINGS:
+    websocket_hub.set_policy(f"performance:delta:{_encoding}", "drop_oldest")
+    websocket_hub.set_policy(f"notifications:delta:{_encoding}", "drop_oldest")
+
+NOTIFICATIONS_POLL_INTERVAL = 5
+latest_notifications = None
+notifications_diff = WindowDiff()
+_background_tasks = []
+
+def performance_payload():
+    """
+    Serialize the last 10 performance logs held by the feed (newest first).
+    """
+    logs = performance_feed.snapshot()
+    return json.dumps({
+        "mse": [log["mse"] for log in logs],
+        "mae": [log["mae"] for log in logs],
+        "rse": [log.get("rse") for log in logs],
+        "timestamps": [str(log["timestamp"]) for log in logs]
+    })
+
+def performance_snapshot(encoding):
+    records = [performance_record(log) for log in performance_feed.snapshot()]
+    return encode_message("snapshot", records, encoding, columnar_metrics=PERFORMANCE_METRICS)
+
+def push_performance_update(new_logs):
+    """
+    Feed listener: serialize once per protocol and fan out to every /ws/performance client.
+    """
+    if websocket_hub.has_subscribers("performance"):
+        websocket_hub.publish("performance", performance_payload())
+
+    records = [performance_record(log) for log in new_logs]
+    for encoding in ENCODINGS:
+        topic = f"performance:delta:{encoding}"
+        if websocket_hub.has_subscribers(topic):
+            websocket_hub.publish(topic, encode_message("delta", records, encoding, columnar_metrics=PERFORMANCE_METRICS))
+
+def notifications_payload(records):
+    return json.dumps({
+        "notifications": [
+            {"_id": r["id"], **{k: v for k, v in r.items() if k != "id"}}
+            for r in records
+        ]
+    })
+
+def notifications_snapshot(encoding):
+    return encode_message("snapshot", latest_notifications or [], encoding)
+
+async def refresh_notifications():
+    """
+    Re-read the last 10 notifications once for all clients and publish whatever changed
+    (status changes are updates, so an insert-only feed would miss them).
+    """
+    global latest_notifications
+    notifications = await notifications_collection.find(sort=[("timestamp", -1)], limit=10)
+    records = [notification_record(n) for n in notifications]
+    upserted, removed = notifications_diff.update(records)
+    if latest_notifications is not None and not upserted and not removed:
+        return
+    latest_notifications = records
+
+    if websocket_hub.has_subscribers("notifications"):
+        websocket_hub.publish("notifications", notifications_payload(records))
+    for encoding in ENCODINGS:
+        topic = f"notifications:delta:{encoding}"
+        if websocket_hub.has_subscribers(topic):
+            websocket_hub.publish(topic, encode_message("delta", upserted, encoding, removed=removed))
+
+async def poll_notifications():
+    while True:
+        try:
+            await refresh_notifications()
+        except Exception as e:
+            print(f"❌ Notification poll failed: {e}")
+        await asyncio.sleep(NOTIFICATIONS_POLL_INTERVAL)
+
+@app.on_event("startup")
+async def start_feeds():
+    await run_blocking(ensure_indexes)
+    performance_feed.add_listener(push_performance_update)
+    await performance_feed.start()
+    _background_tasks.append(asyncio.create_task(poll_notifications()))
+
+@app.on_event("shutdown")
+async def stop_feeds():
+    await performance_feed.stop()
+    for task in _background_tasks:
+        task.cancel()
+
+async def send_payload(websocket: WebSocket, payload):
+    if isinstance(payload, bytes):
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+async def wait_for_disconnect(websocket: WebSocket):
+    """
+    Read (and ignore) client frames until the client disconnects, so a closed socket is noticed
+    right away instead of on the next send.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+async def stream_topic(websocket: WebSocket, topic, snapshot, resync_on_lag=False):
+    """
+    Send the initial view, then forward everything the hub queues for this client until it disconnects.
+    :param snapshot: Callable returning the current full view for this client's protocol
+    :param resync_on_lag: Replace dropped messages with a fresh snapshot (needed for deltas)
+    """
+    subscription = websocket_hub.subscribe(topic)
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        await send_payload(websocket, snapshot())
+        while True:
+            next_payload = asyncio.create_task(subscription.get())
+            await asyncio.wait({next_payload, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_payload.cancel()
+                return
+            payload = next_payload.result()
+            if resync_on_lag and subscription.lagged:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.lagged = False
+                payload = snapshot()
+            await send_payload(websocket, payload)
+    finally:
+        disconnected.cancel()
+        websocket_hub.unsubscribe(subscription)
+
+@app.get("/ws/metrics")
+def websocket_metrics():
+    """
+    Subscriber counts, per-client queue depths and drop counters for each topic.
+    """
+    return websocket_hub.metrics()
 
 @app.websocket("/ws/performance")
-async def performance_websocket(websocket: WebSocket):
+async def performance_websocket(websocket: WebSocket, mode: str = "full", encoding: str = "json"):
     """
     WebSocket connection for streaming AI performance metrics in real time.
+    mode=full (default) pushes the whole last-10 view on every update;
+    mode=delta sends a snapshot once and then only newly inserted records.
+    encoding=msgpack sends binary frames with metrics packed as float64 columns.
     """
+    mode, encoding = negotiate(mode, encoding)
     await websocket.accept()
-    websocket_connections["performance"].append(websocket)
 
     try:
-        while True:
-            logs = list(performance_logs.find().sort("timestamp", -1).limit(10))
-            data = {
-                "mse": [log["mse"] for log in logs],
-                "mae": [log["mae"] for log in logs],
-                "rse": [log["rse"] for log in logs],
-                "timestamps": [str(log["timestamp"]) for log in logs]
-            }
-            await websocket.send_text(json.dumps(data))
-            await asyncio.sleep(5)  # Stream updates every 5 seconds
+        if mode == "delta":
+            await stream_topic(websocket, f"performance:delta:{encoding}",
+                               lambda: performance_snapshot(encoding), resync_on_lag=True)
+        else:
+            await stream_topic(websocket, "performance", performance_payload)
     except Exception as e:
         print(f"WebSocket Disconnected (Performance): {e}")
-    finally:
-        websocket_connections["performance"].remove(websocket)
 
 @app.websocket("/ws/notifications")
-async def notifications_websocket(websocket: WebSocket):
+async def notifications_websocket(websocket: WebSocket, mode: str = "full", encoding: str = "json"):
     """
     WebSocket connection for streaming AI notifications in real time.
+    mode=delta sends a snapshot once and then only new/changed notifications plus removed ids.
     """
+    mode, encoding = negotiate(mode, encoding)
     await websocket.accept()
-    websocket_connections["notifications"].append(websocket)
 
     try:
-        while True:
-            notifications = list(notifications_collection.find().sort("timestamp", -1).limit(10))
-            data = {
-                "notifications": [
-                    {
-                        "_id": str(n["_id"]),
-                        "update_details": n["update_details"],
-                        "status": n["status"],
-                        "type": n["type"],
-                        "timestamp": str(n["timestamp"])
-                    }
-                    for n in notifications
-                ]
-            }
-            await websocket.send_text(json.dumps(data))
-            await asyncio.sleep(5)  # Stream updates every 5 seconds
+        if latest_notifications is None:
+            await refresh_notifications()
+        if mode == "delta":
+            await stream_topic(websocket, f"notifications:delta:{encoding}",
+                               lambda: notifications_snapshot(encoding), resync_on_lag=True)
+        else:
+            await stream_topic(websocket, "notifications", lambda: notifications_payload(latest_notifications))
     except Exception as e:
         print(f"WebSocket Disconnected (Notifications): {e}")
-    finally:
-        websocket_connections["notifications"].remove(websocket)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # permessage-deflate compresses JSON frames for clients that negotiate it
+    uvicorn.run(app, host="0.0.0.0", port=8001, ws_per_message_deflate=True)
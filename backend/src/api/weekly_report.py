@@ -1,15 +1,14 @@
 # /Users/patrick/Projects/Teralynk/backend/src/api/weekly_report.py
 
-from pymongo import MongoClient
+from db.mongo_registry import get_collection
+from pymongo.errors import OperationFailure
+import numpy as np
 import datetime
 import smtplib
 import os
 
-# MongoDB Connection
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-performance_logs = db["ai_performance_logs"]
+# MongoDB Collections (shared, lazily connected pool)
+performance_logs = get_collection("ai_performance_logs")
 
 # Email Configuration
 SMTP_SERVER = "smtp.gmail.com"
@@ -18,24 +17,127 @@ EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 ADMIN_EMAIL = "admin@example.com"
 
+PERCENTILES = (0.5, 0.95, 0.99)
+
+def weekly_summary_pipeline(since):
+    """
+    Aggregation that returns only the weekly summary and per-day buckets.
+    $percentile needs MongoDB 7.0+; older servers fall back to the Python path.
+    """
+    metric_stats = {}
+    for metric in ("mse", "mae"):
+        metric_stats[f"avg_{metric}"] = {"$avg": f"${metric}"}
+        metric_stats[f"{metric}_percentiles"] = {
+            "$percentile": {"input": f"${metric}", "p": list(PERCENTILES), "method": "approximate"}
+        }
+
+    return [
+        {"$match": {"timestamp": {"$gte": since}}},
+        {"$facet": {
+            "summary": [
+                {"$group": {"_id": None, "count": {"$sum": 1}, **metric_stats}},
+            ],
+            "daily": [
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                    "count": {"$sum": 1},
+                    "avg_mse": {"$avg": "$mse"},
+                    "avg_mae": {"$avg": "$mae"},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]
+
+def summarize_with_aggregation(since):
+    result = list(performance_logs.aggregate(weekly_summary_pipeline(since)))[0]
+    if not result["summary"]:
+        return None
+
+    summary = result["summary"][0]
+    return {
+        "count": summary["count"],
+        "avg_mse": summary["avg_mse"],
+        "avg_mae": summary["avg_mae"],
+        "mse_percentiles": dict(zip(PERCENTILES, summary["mse_percentiles"])),
+        "mae_percentiles": dict(zip(PERCENTILES, summary["mae_percentiles"])),
+        "daily": [
+            {"day": day["_id"].date(), "count": day["count"], "avg_mse": day["avg_mse"], "avg_mae": day["avg_mae"]}
+            for day in result["daily"]
+        ],
+    }
+
+def summarize_in_python(since):
+    """
+    Fallback for servers/mocks without $percentile or $dateTrunc: stream only the needed fields.
+    """
+    cursor = performance_logs.find(
+        {"timestamp": {"$gte": since}}, {"_id": 0, "timestamp": 1, "mse": 1, "mae": 1}
+    )
+    mse_values, mae_values, days = [], [], {}
+    for log in cursor:
+        mse_values.append(log["mse"])
+        mae_values.append(log["mae"])
+        bucket = days.setdefault(log["timestamp"].date(), [0, 0.0, 0.0])
+        bucket[0] += 1
+        bucket[1] += log["mse"]
+        bucket[2] += log["mae"]
+
+    if not mse_values:
+        return None
+
+    mse = np.asarray(mse_values, dtype=np.float64)
+    mae = np.asarray(mae_values, dtype=np.float64)
+    quantiles = [p * 100 for p in PERCENTILES]
+    return {
+        "count": len(mse),
+        "avg_mse": float(mse.mean()),
+        "avg_mae": float(mae.mean()),
+        "mse_percentiles": dict(zip(PERCENTILES, np.percentile(mse, quantiles).tolist())),
+        "mae_percentiles": dict(zip(PERCENTILES, np.percentile(mae, quantiles).tolist())),
+        "daily": [
+            {"day": day, "count": count, "avg_mse": mse_sum / count, "avg_mae": mae_sum / count}
+            for day, (count, mse_sum, mae_sum) in sorted(days.items())
+        ],
+    }
+
+def compute_weekly_summary(days=7):
+    """
+    Summarize the last `days` of performance logs, server-side when the database supports it.
+    """
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    try:
+        return summarize_with_aggregation(since)
+    except (OperationFailure, NotImplementedError) as e:
+        print(f"⚠️ Aggregation unavailable, summarizing in Python: {e}")
+        return summarize_in_python(since)
+
 def generate_weekly_report():
     """
     Generate and send AI performance summary for the past week.
     """
-    one_week_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
-    logs = list(performance_logs.find({"timestamp": {"$gte": one_week_ago}}))
+    summary = compute_weekly_summary()
 
-    if not logs:
+    if not summary:
         return "No AI performance data available for the past week."
 
-    avg_mse = sum(log["mse"] for log in logs) / len(logs)
-    avg_mae = sum(log["mae"] for log in logs) / len(logs)
+    mse_p = summary["mse_percentiles"]
+    mae_p = summary["mae_percentiles"]
+    daily_lines = "\n".join(
+        f"    - {day['day']}: MSE {day['avg_mse']:.4f}, MAE {day['avg_mae']:.4f} ({day['count']} logs)"
+        for day in summary["daily"]
+    )
 
     report = f"""
     AI Weekly Performance Report:
-    - Average MSE: {avg_mse:.4f}
-    - Average MAE: {avg_mae:.4f}
-    - Logs Analyzed: {len(logs)}
+    - Average MSE: {summary['avg_mse']:.4f}
+    - Average MAE: {summary['avg_mae']:.4f}
+    - MSE p50/p95/p99: {mse_p[0.5]:.4f} / {mse_p[0.95]:.4f} / {mse_p[0.99]:.4f}
+    - MAE p50/p95/p99: {mae_p[0.5]:.4f} / {mae_p[0.95]:.4f} / {mae_p[0.99]:.4f}
+    - Logs Analyzed: {summary['count']}
+
+    Daily Trend:
+{daily_lines}
     """
 
     send_email_report(report)
@@ -0,0 +1,87 @@
+# /Users/patrick/Projects/Teralynk/backend/src/api/ws_protocol.py
+
+import json
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients fall back to JSON
+    msgpack = None
+
+# "full" re-sends the last-10 view (legacy), "delta" sends a snapshot then only new/changed records
+MODES = ("full", "delta")
+ENCODINGS = ("json", "msgpack") if msgpack else ("json",)
+
+PERFORMANCE_METRICS = ("mse", "mae", "rse")
+
+
+def performance_record(log):
+    return {
+        "id": str(log["_id"]),
+        "timestamp": str(log["timestamp"]),
+        "mse": log.get("mse"),
+        "mae": log.get("mae"),
+        "rse": log.get("rse"),
+    }
+
+
+def notification_record(notification):
+    return {
+        "id": str(notification["_id"]),
+        "update_details": notification["update_details"],
+        "status": notification["status"],
+        "type": notification["type"],
+        "timestamp": str(notification["timestamp"]),
+    }
+
+
+def negotiate(mode, encoding):
+    """
+    Normalize the client's requested mode/encoding, falling back to the legacy full JSON view.
+    """
+    mode = mode if mode in MODES else "full"
+    encoding = encoding if encoding in ENCODINGS else "json"
+    return mode, encoding
+
+
+def encode_message(message_type, records, encoding, removed=None, columnar_metrics=None):
+    """
+    Encode a snapshot/delta message.
+    JSON: {"type", "records", "removed"}.
+    msgpack: same envelope, but when `columnar_metrics` is given the records are sent column-wise
+    with each metric as a packed little-endian float64 buffer (NaN for missing values).
+    """
+    if encoding == "msgpack":
+        message = {"type": message_type, "removed": removed or []}
+        if columnar_metrics:
+            message["id"] = [r["id"] for r in records]
+            message["timestamp"] = [r["timestamp"] for r in records]
+            for name in columnar_metrics:
+                values = [np.nan if r.get(name) is None else r[name] for r in records]
+                message[name] = np.asarray(values, dtype="<f8").tobytes()
+        else:
+            message["records"] = records
+        return msgpack.packb(message, use_bin_type=True)
+
+    message = {"type": message_type, "records": records}
+    if removed:
+        message["removed"] = removed
+    return json.dumps(message)
+
+
+class WindowDiff:
+    def __init__(self):
+        """
+        Tracks the last published window of records (keyed by id) to compute deltas.
+        """
+        self.records = {}
+
+    def update(self, records):
+        """
+        Replace the window and return (upserted records, removed ids) relative to the previous one.
+        """
+        current = {r["id"]: r for r in records}
+        upserted = [r for r in records if self.records.get(r["id"]) != r]
+        removed = [record_id for record_id in self.records if record_id not in current]
+        self.records = current
+        return upserted, removed
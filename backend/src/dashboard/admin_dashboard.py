@@ -1,16 +1,14 @@
 # /Users/patrick/Projects/Teralynk/backend/src/dashboard/admin_dashboard.py
 
 from flask import Flask, jsonify, request
-from pymongo import MongoClient
+from db.mongo_registry import get_collection
+from db.indexes import ensure_indexes
 import datetime
 
 app = Flask(__name__)
 
-# Connect to MongoDB
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-optimizations_collection = db["global_optimizations"]
+# MongoDB Collections (shared, lazily connected pool)
+optimizations_collection = get_collection("global_optimizations")
 
 @app.route("/admin/optimizations", methods=["GET"])
 def get_pending_optimizations():
@@ -61,4 +59,5 @@ def apply_ai_update(update_code):
         print(f"❌ AI Code Update Failed: {e}")
 
 if __name__ == "__main__":
+    ensure_indexes()
     app.run(port=5002, debug=True)
@@ -2,14 +2,11 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-from pymongo import MongoClient
+from db.mongo_registry import get_collection
 import datetime
 
-# Connect to MongoDB
-mongo_uri = "mongodb://localhost:27017/"
-client = MongoClient(mongo_uri)
-db = client["teralynk_ai"]
-performance_logs = db["ai_performance_logs"]
+# MongoDB Collections (shared, lazily connected pool)
+performance_logs = get_collection("ai_performance_logs")
 
 def fetch_ai_performance_data():
     """
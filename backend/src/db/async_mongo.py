@@ -0,0 +1,104 @@
+# /Users/patrick/Projects/Teralynk/backend/src/db/async_mongo.py
+
+import asyncio
+import functools
+import os
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from db.mongo_registry import get_collection
+
+# Blocking pymongo calls run on this pool so coroutines never stall the event loop
+MONGO_ASYNC_WORKERS = int(os.getenv("MONGO_ASYNC_WORKERS", "32"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the shared thread pool used for MongoDB calls, creating it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MONGO_ASYNC_WORKERS, thread_name_prefix="mongo-async")
+        return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable on the MongoDB executor and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+class AsyncCollection:
+    def __init__(self, collection):
+        """
+        Awaitable wrapper around a pymongo collection.
+        Cursor-returning calls are materialized inside the executor, so callers should always
+        bound them with `limit` or a selective filter.
+        """
+        self.collection = collection
+
+    @property
+    def name(self):
+        return self.collection.name
+
+    async def find(self, filter=None, projection=None, sort=None, limit=0, skip=0):
+        def _find():
+            cursor = self.collection.find(filter or {}, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if skip:
+                cursor = cursor.skip(skip)
+            if limit:
+                cursor = cursor.limit(limit)
+            return list(cursor)
+        return await run_blocking(_find)
+
+    async def iter_batches(self, filter=None, projection=None, sort=None, batch_size=1000):
+        """
+        Async generator over a server-side cursor, yielding lists of up to `batch_size` documents.
+        Only one batch is held in memory at a time.
+        """
+        def _open():
+            cursor = self.collection.find(filter or {}, projection, batch_size=batch_size)
+            return cursor.sort(sort) if sort else cursor
+
+        cursor = await run_blocking(_open)
+        try:
+            while True:
+                batch = await run_blocking(lambda: list(islice(cursor, batch_size)))
+                if not batch:
+                    break
+                yield batch
+        finally:
+            cursor.close()
+
+    async def find_one(self, filter=None, projection=None, sort=None):
+        return await run_blocking(self.collection.find_one, filter or {}, projection, sort=sort)
+
+    async def count_documents(self, filter=None, **kwargs):
+        return await run_blocking(self.collection.count_documents, filter or {}, **kwargs)
+
+    async def aggregate(self, pipeline, **kwargs):
+        return await run_blocking(lambda: list(self.collection.aggregate(pipeline, **kwargs)))
+
+    async def insert_one(self, document):
+        return await run_blocking(self.collection.insert_one, document)
+
+    async def insert_many(self, documents, ordered=False):
+        return await run_blocking(self.collection.insert_many, documents, ordered=ordered)
+
+    async def update_one(self, filter, update, upsert=False):
+        return await run_blocking(self.collection.update_one, filter, update, upsert=upsert)
+
+
+def get_async_collection(name, db_name=None, uri=None):
+    """
+    Awaitable view of a collection from the shared client registry.
+    """
+    return AsyncCollection(get_collection(name, db_name, uri))
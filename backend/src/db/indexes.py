@@ -0,0 +1,151 @@
+# /Users/patrick/Projects/Teralynk/backend/src/db/indexes.py
+
+import datetime
+import os
+import sys
+import threading
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from db.mongo_registry import get_db
+
+# Raw performance logs expire after this many days; rollups keep the long-range history
+RAW_LOG_TTL_DAYS = int(os.getenv("RAW_LOG_TTL_DAYS", "90"))
+
+# Declared indexes per collection
+INDEXES = {
+    "ai_performance_logs": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp"),
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id"),
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl",
+                   expireAfterSeconds=RAW_LOG_TTL_DAYS * 24 * 3600),
+    ],
+    "ai_notifications": [
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id"),
+        IndexModel([("type", ASCENDING), ("timestamp", DESCENDING)], name="type_timestamp"),
+        IndexModel([("status", ASCENDING), ("timestamp", DESCENDING)], name="status_timestamp"),
+    ],
+    "global_optimizations": [
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "user_profiles": [
+        IndexModel([("user_id", ASCENDING)], name="user_id", unique=True),
+    ],
+    "ai_performance_rollups": [
+        IndexModel([("granularity", ASCENDING), ("bucket", ASCENDING)], name="granularity_bucket"),
+    ],
+}
+
+
+def known_queries():
+    """
+    Hot queries issued by the backend, with representative values, for plan verification.
+    Each entry: (description, collection, filter, sort, limit).
+    """
+    week_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
+    return [
+        ("UnsupervisedAI.self_optimize_code recent user logs", "ai_performance_logs",
+         {"user_id": "sample-user", "timestamp": {"$lt": week_ago}}, [("timestamp", DESCENDING)], 9),
+        ("BehaviorClusterEngine refit history", "ai_performance_logs",
+         {"user_id": "sample-user"}, [("timestamp", DESCENDING)], 1000),
+        ("behavior_clustering_job per-user history scan", "ai_performance_logs",
+         {"user_id": {"$exists": True}}, [("user_id", ASCENDING), ("timestamp", DESCENDING)], 0),
+        ("recent performance logs (trends, dashboards, websocket feed)", "ai_performance_logs",
+         {}, [("timestamp", DESCENDING), ("_id", DESCENDING)], 50),
+        ("weekly_report time range", "ai_performance_logs",
+         {"timestamp": {"$gte": week_ago}}, None, 0),
+        ("admin_dashboard pending optimizations", "global_optimizations",
+         {"status": "Pending Approval"}, None, 0),
+        ("logs_api page", "ai_notifications",
+         {}, [("timestamp", DESCENDING), ("_id", DESCENDING)], 100),
+        ("logs_api page filtered by type", "ai_notifications",
+         {"type": "AI Optimization"}, [("timestamp", DESCENDING)], 100),
+        ("logs_api page filtered by status", "ai_notifications",
+         {"status": "Pending Approval"}, [("timestamp", DESCENDING)], 100),
+        ("rollup range query", "ai_performance_rollups",
+         {"granularity": "hour", "bucket": {"$gte": week_ago}}, None, 0),
+    ]
+
+
+_ensured = set()
+_ensure_lock = threading.Lock()
+
+
+def ensure_indexes(db=None):
+    """
+    Create every declared index. Safe to call on each startup: existing indexes are left alone,
+    and a changed TTL is applied in place with collMod. Runs once per database per process.
+    """
+    db = db if db is not None else get_db()
+    with _ensure_lock:
+        if db.name in _ensured:
+            return
+        for collection_name, indexes in INDEXES.items():
+            collection = db[collection_name]
+            for index in indexes:
+                try:
+                    collection.create_indexes([index])
+                except OperationFailure as e:
+                    # IndexOptionsConflict (85): same keys, different options, e.g. a new TTL
+                    if e.code == 85 and "expireAfterSeconds" in index.document:
+                        _update_ttl(db, collection_name, index)
+                    else:
+                        print(f"❌ Index {index.document['name']} failed on {collection_name}: {e}")
+        _ensured.add(db.name)
+        print("🗂️ MongoDB indexes ensured.")
+
+
+def _update_ttl(db, collection_name, index):
+    document = index.document
+    try:
+        db.command("collMod", collection_name, index={
+            "keyPattern": document["key"],
+            "expireAfterSeconds": document["expireAfterSeconds"],
+        })
+    except OperationFailure as e:
+        # e.g. missing collMod privilege, or an index on the same keys that is not a TTL index
+        print(f"❌ TTL update for {document['name']} failed on {collection_name}: {e}")
+        return
+    print(f"⏳ Updated TTL on {collection_name}.{document['name']}")
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def check_query_plans(db=None):
+    """
+    Run explain() on every known query and return the ones whose winning plan is a collection scan.
+    """
+    db = db if db is not None else get_db()
+    failures = []
+    for description, collection_name, filter, sort, limit in known_queries():
+        cursor = db[collection_name].find(filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning_plan))
+        if "COLLSCAN" in stages:
+            failures.append({"query": description, "collection": collection_name, "stages": stages})
+    return failures
+
+
+if __name__ == "__main__":
+    # python -m db.indexes            -> apply indexes
+    # python -m db.indexes --check    -> apply indexes, then fail if any known query scans a collection
+    ensure_indexes()
+    if "--check" in sys.argv:
+        failures = check_query_plans()
+        for failure in failures:
+            print(f"❌ COLLSCAN: {failure['query']} on {failure['collection']} ({' -> '.join(failure['stages'])})")
+        if failures:
+            sys.exit(1)
+        print("✅ All known queries use an index.")
@@ -0,0 +1,58 @@
+# /Users/patrick/Projects/Teralynk/backend/src/db/mongo_registry.py
+
+import os
+import threading
+from pymongo import MongoClient
+
+# Connection settings (override via environment)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "teralynk_ai")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# One client (and therefore one connection pool) per URI for the whole process
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(uri=None):
+    """
+    Return the shared MongoClient for a URI, creating it on first use.
+    The client is built with connect=False, so no sockets or monitor threads
+    are opened until the first operation.
+    """
+    uri = uri or MONGO_URI
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = MongoClient(
+                uri,
+                connect=False,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            )
+            _clients[uri] = client
+        return client
+
+
+def get_db(db_name=None, uri=None):
+    return get_client(uri)[db_name or MONGO_DB_NAME]
+
+
+def get_collection(name, db_name=None, uri=None):
+    return get_db(db_name, uri)[name]
+
+
+def close_all_clients():
+    """
+    Close every pooled client. Intended for process shutdown and tests.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,264 @@
+# /Users/patrick/Projects/Teralynk/backend/src/db/rollups.py
+
+import datetime
+import math
+from collections import defaultdict
+from pymongo import UpdateOne
+from db.indexes import RAW_LOG_TTL_DAYS
+from db.mongo_registry import get_collection
+
+ROLLUP_COLLECTION = "ai_performance_rollups"
+ROLLUP_METRICS = ("mse", "mae", "rse")
+
+# Finest to coarsest
+GRANULARITIES = {
+    "minute": datetime.timedelta(minutes=1),
+    "hour": datetime.timedelta(hours=1),
+    "day": datetime.timedelta(days=1),
+}
+
+# Log-scale histogram used as a mergeable quantile sketch (~2.5% relative error)
+SKETCH_GAMMA = 1.05
+_LOG_GAMMA = math.log(SKETCH_GAMMA)
+ZERO_BIN = "z"
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def sketch_bin(value):
+    if value <= 0:
+        return ZERO_BIN
+    return str(math.ceil(math.log(value) / _LOG_GAMMA))
+
+
+def sketch_value(key):
+    if key == ZERO_BIN:
+        return 0.0
+    index = int(key)
+    return 2 * SKETCH_GAMMA ** index / (SKETCH_GAMMA + 1)
+
+
+def build_rollup_updates(logs):
+    """
+    Fold a batch of raw performance logs into one upsert per touched (granularity, bucket).
+    """
+    buckets = {}
+    for log in logs:
+        timestamp = log.get("timestamp")
+        if timestamp is None:
+            continue
+        for granularity in GRANULARITIES:
+            start = bucket_start(timestamp, granularity)
+            bucket = buckets.setdefault((granularity, start), {
+                "inc": defaultdict(int), "min": {}, "max": {},
+            })
+            for metric in ROLLUP_METRICS:
+                value = log.get(metric)
+                if value is None:
+                    continue
+                value = float(value)
+                inc = bucket["inc"]
+                inc[f"{metric}.count"] += 1
+                inc[f"{metric}.sum"] += value
+                inc[f"{metric}.sum_sq"] += value * value
+                inc[f"{metric}.hist.{sketch_bin(value)}"] += 1
+                key = f"{metric}.min"
+                bucket["min"][key] = min(bucket["min"].get(key, value), value)
+                key = f"{metric}.max"
+                bucket["max"][key] = max(bucket["max"].get(key, value), value)
+
+    updates = []
+    for (granularity, start), bucket in buckets.items():
+        if not bucket["inc"]:
+            continue
+        update = {
+            "$setOnInsert": {"granularity": granularity, "bucket": start},
+            "$inc": dict(bucket["inc"]),
+            "$min": bucket["min"],
+            "$max": bucket["max"],
+        }
+        updates.append(UpdateOne({"_id": f"{granularity}|{start.isoformat()}"}, update, upsert=True))
+    return updates
+
+
+class PerformanceRollups:
+    def __init__(self, collection=None):
+        """
+        Minute/hour/day rollups of the performance metric stream (count, sum, sum of squares,
+        min, max and a log-histogram sketch per metric), kept in `ai_performance_rollups`.
+        """
+        self.collection = collection if collection is not None else get_collection(ROLLUP_COLLECTION)
+
+    def apply(self, logs):
+        """
+        Incrementally add raw logs to every bucket they fall into. One bulk_write per call.
+        """
+        updates = build_rollup_updates(logs)
+        if updates:
+            self.collection.bulk_write(updates, ordered=False)
+
+    def rebuild(self, raw_collection, since=None, batch_size=5000):
+        """
+        Backfill rollups from raw logs (e.g. for history written before rollups existed).
+        Existing buckets from `since` (rounded down to the day) onward are replaced, not added to.
+        Raw logs expire after RAW_LOG_TTL_DAYS, so `since` is clamped to the first whole day they
+        still cover: older buckets are the only remaining record of that history and are kept.
+        """
+        now = datetime.datetime.utcnow()
+        oldest = bucket_start(now - datetime.timedelta(days=RAW_LOG_TTL_DAYS), "day") + GRANULARITIES["day"]
+        since = max(bucket_start(since, "day"), oldest) if since else oldest
+        self.collection.delete_many({"bucket": {"$gte": since}})
+
+        query = {"timestamp": {"$gte": since}}
+        cursor = raw_collection.find(query, {"_id": 0, "timestamp": 1, **{m: 1 for m in ROLLUP_METRICS}},
+                                     batch_size=batch_size)
+        batch = []
+        for log in cursor:
+            batch.append(log)
+            if len(batch) >= batch_size:
+                self.apply(batch)
+                batch = []
+        if batch:
+            self.apply(batch)
+
+    def plan(self, start, end):
+        """
+        Cover [start, end) with the fewest buckets: whole days in the middle, hours next to them,
+        minutes at the unaligned edges. Sub-minute edges widen to whole minutes, so the
+        minute containing `end` (e.g. the current, still-filling minute) is included.
+        """
+        start = bucket_start(start, "minute")
+        aligned_end = bucket_start(end, "minute")
+        end = aligned_end if aligned_end == end else aligned_end + GRANULARITIES["minute"]
+        return _plan_segments(start, end, ["day", "hour", "minute"])
+
+    def query(self, start, end, metric="mse", quantiles=(0.5, 0.95, 0.99)):
+        """
+        Summary statistics for a metric over [start, end), answered from rollup buckets only.
+        """
+        segments = self.plan(start, end)
+        if not segments:
+            return _summarize(_empty_metric(), quantiles)
+        query = {"$or": [
+            {"granularity": granularity, "bucket": {"$gte": seg_start, "$lt": seg_end}}
+            for granularity, seg_start, seg_end in segments
+        ]}
+        merged = _empty_metric()
+        for doc in self.collection.find(query, {metric: 1}):
+            _merge_metric(merged, doc.get(metric))
+        return _summarize(merged, quantiles)
+
+    def series(self, start, end, metric="mse", granularity=None, max_points=500):
+        """
+        Per-bucket series for charts. Picks the finest granularity that stays within `max_points`.
+        """
+        if granularity is None:
+            span = end - start
+            granularity = next(
+                (g for g, size in GRANULARITIES.items() if span / size <= max_points), "day"
+            )
+        docs = self.collection.find(
+            {"granularity": granularity, "bucket": {"$gte": bucket_start(start, granularity), "$lt": end}},
+            {"bucket": 1, metric: 1},
+        ).sort("bucket", 1)
+        points = []
+        for doc in docs:
+            stats = _empty_metric()
+            _merge_metric(stats, doc.get(metric))
+            summary = _summarize(stats, ())
+            summary["bucket"] = doc["bucket"]
+            points.append(summary)
+        return {"granularity": granularity, "points": points}
+
+
+def _plan_segments(start, end, levels):
+    if start >= end:
+        return []
+    granularity = levels[0]
+    if len(levels) == 1:
+        return [(granularity, start, end)]
+    size = GRANULARITIES[granularity]
+    aligned_start = bucket_start(start, granularity)
+    if aligned_start < start:
+        aligned_start += size
+    aligned_end = bucket_start(end, granularity)
+    if aligned_start >= aligned_end:
+        return _plan_segments(start, end, levels[1:])
+    return (
+        _plan_segments(start, aligned_start, levels[1:])
+        + [(granularity, aligned_start, aligned_end)]
+        + _plan_segments(aligned_end, end, levels[1:])
+    )
+
+
+def _empty_metric():
+    return {"count": 0, "sum": 0.0, "sum_sq": 0.0, "min": None, "max": None, "hist": defaultdict(int)}
+
+
+def _merge_metric(merged, stats):
+    if not stats:
+        return
+    merged["count"] += stats.get("count", 0)
+    merged["sum"] += stats.get("sum", 0.0)
+    merged["sum_sq"] += stats.get("sum_sq", 0.0)
+    for key, pick in (("min", min), ("max", max)):
+        if stats.get(key) is not None:
+            merged[key] = stats[key] if merged[key] is None else pick(merged[key], stats[key])
+    for key, count in stats.get("hist", {}).items():
+        merged["hist"][key] += count
+
+
+def _summarize(merged, quantiles):
+    count = merged["count"]
+    mean = merged["sum"] / count if count else 0.0
+    variance = max(merged["sum_sq"] / count - mean * mean, 0.0) if count else 0.0
+    summary = {
+        "count": int(count),
+        "mean": mean,
+        "std": math.sqrt(variance),
+        "min": merged["min"],
+        "max": merged["max"],
+    }
+    if quantiles:
+        summary["quantiles"] = {q: _sketch_quantile(merged["hist"], count, q) for q in quantiles}
+    return summary
+
+
+def _sketch_quantile(hist, count, q):
+    if not count:
+        return None
+    keys = sorted(hist, key=lambda k: -math.inf if k == ZERO_BIN else int(k))
+    rank = max(math.ceil(q * count), 1)  # nearest-rank
+    seen = 0
+    for key in keys:
+        seen += hist[key]
+        if seen >= rank:
+            return sketch_value(key)
+    return sketch_value(keys[-1])
+
+
+# One rollup store per database
+_rollups = {}
+
+
+def get_rollups(database=None):
+    collection = database[ROLLUP_COLLECTION] if database is not None else get_collection(ROLLUP_COLLECTION)
+    key = collection.database.name
+    if key not in _rollups:
+        _rollups[key] = PerformanceRollups(collection)
+    return _rollups[key]
+
+
+def attach_rollups(log_buffer):
+    """
+    Keep rollups current by folding every batch the performance-log buffer writes.
+    Returns the buffer so callers can chain it.
+    """
+    log_buffer.add_listener(get_rollups(log_buffer.collection.database).apply)
+    return log_buffer
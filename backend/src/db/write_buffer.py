@@ -0,0 +1,239 @@
+# /Users/patrick/Projects/Teralynk/backend/src/db/write_buffer.py
+
+import atexit
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+# One buffer per (database, collection) so every module in the process shares it
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+class WriteBehindBuffer:
+    def __init__(self, collection, max_batch_size=500, flush_interval=1.0, max_queue_size=10000,
+                 put_timeout=0.5, max_retries=3):
+        """
+        Coalesce document inserts and write them with insert_many from a background thread.
+        :param collection: pymongo collection the entries are written to
+        :param max_batch_size: Flush as soon as this many entries are pending
+        :param flush_interval: Flush at least this often (seconds) while entries are pending
+        :param max_queue_size: Upper bound on buffered entries; producers block when it is reached
+        :param put_timeout: How long a producer waits for room before writing synchronously
+        :param max_retries: insert_many attempts per batch once close() has been called; until then a
+            failing batch is retried with backoff, and producers fall back to synchronous writes
+            (which raise to the caller) when the queue fills up behind it
+        """
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        # Each queue item is one put()/put_many() call; the size limit counts documents, not items
+        self.queue = queue.Queue()
+        self.pending = 0
+        self._space = threading.Condition()
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "sync_writes": 0, "dropped": 0}
+        self._stats_lock = threading.Lock()
+        self.listeners = []
+        self._stop = threading.Event()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"write-behind-{collection.name}", daemon=True)
+        self._worker.start()
+
+    def add_listener(self, callback):
+        """
+        Register a callback invoked with each list of documents after it has been written.
+        Callbacks run on the writer thread (or the producer's thread for synchronous writes).
+        """
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def put(self, document):
+        """
+        Queue a document for insertion. Blocks for up to `put_timeout` when the queue is full
+        (backpressure); if there is still no room the document is written synchronously.
+        """
+        self.put_many([document])
+
+    def put_many(self, documents):
+        """
+        Queue a list of documents as one unit: a single wait for room and, if the queue stays full,
+        a single synchronous insert_many. A batch larger than the whole queue waits for it to empty.
+        """
+        documents = list(documents)
+        if not documents:
+            return
+        if not self._closed and self._reserve(len(documents)):
+            self.queue.put(documents)
+            self._count("enqueued", len(documents))
+            return
+        self._write_sync(documents)
+
+    def _count(self, key, amount):
+        # Producers, the writer thread and close() all update the counters
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _reserve(self, count):
+        deadline = time.monotonic() + self.put_timeout
+        with self._space:
+            while self.pending and self.pending + count > self.max_queue_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._space.wait(remaining)
+            self.pending += count
+            return True
+
+    def _release(self, count):
+        with self._space:
+            self.pending -= count
+            self._space.notify_all()
+
+    def _write_sync(self, documents):
+        self.collection.insert_many(documents, ordered=False)
+        self._count("sync_writes", len(documents))
+        self._notify(documents)
+
+    @property
+    def depth(self):
+        return self.pending
+
+    def flush(self):
+        """
+        Block until every queued document has been written (or, during shutdown, dropped after retries).
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Stop accepting buffered writes, drain the queue and stop the worker thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._worker.join()
+        # Anything queued after the worker exited is written here
+        self._drain_remaining()
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            items = self._collect_batch()
+            if items:
+                self._write_items(items)
+
+    def _collect_batch(self):
+        # Whole queue items are taken, so a batch may exceed max_batch_size by the last item's size
+        items = []
+        count = 0
+        deadline = time.monotonic() + self.flush_interval
+        while count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            count += len(item)
+            if self._stop.is_set():
+                # Shutting down: take whatever is already queued without waiting
+                deadline = time.monotonic()
+        return items
+
+    def _write_items(self, items):
+        batch = [document for item in items for document in item]
+        try:
+            self._write(batch)
+        finally:
+            self._release(len(batch))
+            for _ in items:
+                self.queue.task_done()
+
+    def _write(self, batch):
+        # insert_many assigns _ids to the documents, so a retry after a partial or unknown outcome
+        # reports the already-written ones as duplicate keys: those count as written, not failed.
+        pending = batch
+        written = []
+        attempt = 0
+        while pending:
+            attempt += 1
+            try:
+                self.collection.insert_many(pending, ordered=False)
+                written.extend(pending)
+                pending = []
+                break
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", [])
+                          if error.get("code") != DUPLICATE_KEY}
+                written.extend(doc for i, doc in enumerate(pending) if i not in failed)
+                pending = [doc for i, doc in enumerate(pending) if i in failed]
+                if not pending:
+                    break
+                print(f"❌ Buffered insert into {self.collection.name} failed for {len(pending)} "
+                      f"entries (attempt {attempt}): {e}")
+            except Exception as e:
+                print(f"❌ Buffered insert into {self.collection.name} failed (attempt {attempt}): {e}")
+            # Keep retrying (e.g. through a failover) while running; only a shutdown gives up
+            if self._stop.is_set() and attempt >= self.max_retries:
+                break
+            time.sleep(min(0.1 * 2 ** attempt, 5.0))
+        if pending:
+            self._count("dropped", len(pending))
+            print(f"❌ Dropped {len(pending)} buffered entries for {self.collection.name}")
+        if written:
+            self._count("written", len(written))
+            self._count("batches", 1)
+            self._notify(written)
+
+    def _notify(self, documents):
+        for callback in self.listeners:
+            try:
+                callback(documents)
+            except Exception as e:
+                print(f"❌ Write listener failed for {self.collection.name}: {e}")
+
+    def _drain_remaining(self):
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if items:
+            self._write_items(items)
+
+
+def get_write_buffer(collection, **options):
+    """
+    Return the process-wide write-behind buffer for a collection, creating it on first use.
+    """
+    key = (collection.database.name, collection.name)
+    with _buffers_lock:
+        buffer = _buffers.get(key)
+        if buffer is None or buffer._closed:
+            buffer = WriteBehindBuffer(collection, **options)
+            _buffers[key] = buffer
+        return buffer
+
+
+def close_all_buffers():
+    """
+    Flush and stop every write-behind buffer. Registered with atexit so buffered logs survive shutdown.
+    """
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+        _buffers.clear()
+    for buffer in buffers:
+        buffer.close()
+
+
+atexit.register(close_all_buffers)
@@ -0,0 +1,61 @@
+# /Users/patrick/Projects/Teralynk/backend/src/tests/test_rollups.py
+# Run from backend/src: python -m unittest tests.test_rollups
+
+import datetime
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from db.indexes import RAW_LOG_TTL_DAYS
+from db.rollups import PerformanceRollups
+
+# Stands in for pymongo.UpdateOne so the fake can read back the filter and update it was built with
+RecordedUpdate = namedtuple("RecordedUpdate", ["filter", "update", "upsert"])
+
+
+class FakeRollupCollection:
+    """
+    Just enough of a pymongo collection for PerformanceRollups.rebuild: buckets keyed by _id.
+    """
+    def __init__(self, buckets):
+        self.docs = {f"day|{bucket.isoformat()}": {"granularity": "day", "bucket": bucket} for bucket in buckets}
+
+    def delete_many(self, query):
+        since = query.get("bucket", {}).get("$gte")
+        for key, doc in list(self.docs.items()):
+            if since is None or doc["bucket"] >= since:
+                del self.docs[key]
+
+    def bulk_write(self, updates, ordered=True):
+        for update in updates:
+            key = update.filter["_id"]
+            self.docs.setdefault(key, dict(update.update["$setOnInsert"]))
+
+
+class FakeRawCollection:
+    def __init__(self, logs):
+        self.logs = logs
+
+    def find(self, query, projection=None, batch_size=None):
+        since = query.get("timestamp", {}).get("$gte")
+        return [log for log in self.logs if since is None or log["timestamp"] >= since]
+
+
+@mock.patch("db.rollups.UpdateOne", RecordedUpdate)
+class RebuildTest(unittest.TestCase):
+    def test_buckets_older_than_raw_log_ttl_survive_rebuild(self):
+        today = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        expired = today - datetime.timedelta(days=RAW_LOG_TTL_DAYS + 30)
+        recent = today - datetime.timedelta(days=1)
+        rollups = PerformanceRollups(FakeRollupCollection([expired, recent]))
+        raw = FakeRawCollection([{"timestamp": recent + datetime.timedelta(hours=1), "mse": 0.1}])
+
+        for since in (None, expired - datetime.timedelta(days=1)):
+            rollups.rebuild(raw, since=since)
+            day_buckets = {doc["bucket"] for doc in rollups.collection.docs.values() if doc["granularity"] == "day"}
+            self.assertIn(expired, day_buckets)
+            self.assertIn(recent, day_buckets)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,28 +14,47 @@ export default function LogPage() {
   const [filter, setFilter] = useState("All");
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  useEffect(() => {
-    const fetchLogs = async () => {
-      try {
-        const response = await fetch("/api/logs");
-        const data = await response.json();
+  const fetchLogs = async (cursor = null) => {
+    const params = new URLSearchParams();
+    if (filter !== "All") params.set("type", filter);
+    if (cursor) params.set("after", cursor);
 
-        if (!response.ok) {
-          throw new Error(data.error || "Failed to load logs.");
-        }
+    try {
+      const response = await fetch(`/api/logs?${params.toString()}`);
+      const data = await response.json();
 
-        setLogs(data.logs || []);
-      } catch (err) {
-        logError(err, "LogPage - fetchLogs");
-        setError(getErrorMessage(err));
-      } finally {
-        setLoading(false);
+      if (!response.ok) {
+        throw new Error(data.detail || data.error || "Failed to load logs.");
       }
-    };
 
+      // The API returns one page at a time; later pages are appended
+      setLogs((previous) => (cursor ? [...previous, ...(data.logs || [])] : data.logs || []));
+      setNextCursor(data.next_cursor || null);
+    } catch (err) {
+      logError(err, "LogPage - fetchLogs");
+      setError(getErrorMessage(err));
+    } finally {
+      setLoading(false);
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    // The type filter is applied by the server, so changing it starts again from the first page
+    setLoading(true);
+    setError("");
+    setLogs([]);
+    setNextCursor(null);
     fetchLogs();
-  }, []);
+  }, [filter]);
+
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchLogs(nextCursor);
+  };
 
   const downloadLogs = async () => {
     try {
@@ -46,10 +65,6 @@ export default function LogPage() {
     }
   };
 
-  const filteredLogs = logs.filter((log) =>
-    filter === "All" ? true : log.type === filter
-  );
-
   return (
     <div className="p-6 max-w-4xl mx-auto">
       <h1 className="text-2xl font-bold mb-6 text-center">📄 AI Notifications Log</h1>
@@ -76,11 +91,11 @@ export default function LogPage() {
         </div>
       ) : error ? (
         <Alert type="error" className="text-center">{error}</Alert>
-      ) : filteredLogs.length === 0 ? (
+      ) : logs.length === 0 ? (
         <p className="text-center text-gray-500">No log entries available.</p>
       ) : (
         <div className="grid gap-4">
-          {filteredLogs.map((log) => (
+          {logs.map((log) => (
             <Card key={log._id} className="bg-gray-50 border border-gray-200 shadow-sm">
               <CardContent className="p-4">
                 <p className="text-lg font-medium">{log.details}</p>
@@ -88,6 +103,16 @@ export default function LogPage() {
               </CardContent>
             </Card>
           ))}
+
+          {nextCursor && (
+            <Button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="bg-gray-200 hover:bg-gray-300 text-gray-800"
+            >
+              {loadingMore ? "Loading..." : "Load More"}
+            </Button>
+          )}
         </div>
       )}
     </div>
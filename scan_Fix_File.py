@@ -2,9 +2,10 @@
 
 import openai
 import os
-import time
-import random
-import csv
+from scan_cache import ScanCache
+from scan_chunker import chunk_file
+from scan_engine import SCAN_BACKEND, ScanEngine
+from scan_runner import ISSUE_KEYWORDS, run_scan
 
 # ==============================
 # CONFIGURATION
@@ -12,7 +13,7 @@ import csv
 
 openai.api_key = os.getenv("OPENAI_API_KEY")  # Load from secure environment variable
 
-if not openai.api_key:
+if not openai.api_key and SCAN_BACKEND != "mock":
     raise ValueError("❌ OPENAI_API_KEY is not set in the environment!")
 
 project_root = "/Users/patrick/downloads/FileScan"
@@ -25,10 +26,10 @@ output_csv_backend = "backend_scan_results.csv"
 valid_extensions = ('.txt',)
 excluded_folders = {'node_modules', 'build', 'dist', '.git', '.next', '.vercel', '.vite'}
 excluded_files = {'package-lock.json'}
+# Directories listed concurrently while files are already being reviewed
+walk_workers = 4
 
-max_chunk_size = 3000
-MIN_PAUSE = 6
-MAX_PAUSE = 8
+max_chunk_tokens = 1500
 
 error_context = """
 IMPORTANT CONTEXT:
@@ -62,109 +63,34 @@ Only report concrete and high-confidence findings based on actual code usage pat
 # FUNCTIONS
 # ==============================
 
-def should_exclude(folder_path, filename):
-    parts = folder_path.split(os.sep)
-    return any(part in excluded_folders for part in parts) or filename in excluded_files
-
-def load_already_scanned_files(filename):
-    scanned = set()
-    if os.path.exists(filename):
-        with open(filename, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                scanned.add(row['File'])
-    return scanned
-
-def append_result_to_csv(csv_file, file_path, status, comments):
-    file_exists = os.path.isfile(csv_file)
-    with open(csv_file, mode='a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['File', 'Status', 'Comments']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({'File': file_path, 'Status': status, 'Comments': comments})
+engine = None
 
-def review_file(file_path, file_content):
-    try:
-        chunks = [file_content[i:i+max_chunk_size] for i in range(0, len(file_content), max_chunk_size)] or [file_content]
-        all_reviews = []
-
-        for idx, chunk in enumerate(chunks):
-            attempt = 0
-            success = False
-            while not success:
-                try:
-                    print(f"🧠 Chunk {idx+1}/{len(chunks)} for {file_path}")
-                    response = openai.ChatCompletion.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": analysis_prompt + error_context},
-                            {"role": "user", "content": chunk}
-                        ],
-                        temperature=0.2
-                    )
-                    result = response['choices'][0]['message']['content']
-                    all_reviews.append(result)
-                    success = True
-                    time.sleep(random.uniform(MIN_PAUSE, MAX_PAUSE))
-
-                except openai.error.RateLimitError as e:
-                    print(f"🚫 Rate limit hit: {str(e)}")
-                    time.sleep(random.uniform(10, 20))
-                    attempt += 1
-
-                except Exception as e:
-                    print(f"❗ Error on chunk: {e}")
-                    if "502" in str(e):
-                        time.sleep(random.uniform(10, 15))
-                        attempt += 1
-                        continue
-                    return f"Error: {e}"
-
-        return "\n\n".join(all_reviews)
-
-    except Exception as e:
-        return f"Error during chunking: {e}"
-
-def scan_project(project_path, csv_output, start_from=None, force_rescan=False):
-    already_scanned = load_already_scanned_files(csv_output) if not force_rescan else set()
-    files_to_scan = []
-
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not should_exclude(os.path.join(root, d), '')]
-        for filename in sorted(files):
-            if filename.endswith(valid_extensions) and not should_exclude(root, filename):
-                full_path = os.path.normpath(os.path.join(root, filename))
-                files_to_scan.append(full_path)
-
-    if start_from:
-        print(f"🔵 Resuming from file: {start_from}")
-        files_to_scan = [f for f in files_to_scan if f >= start_from]
-
-    print(f"\n📋 {len(files_to_scan)} files to scan.\n")
+def get_engine():
+    # Requests are paced by the engine's token buckets instead of a fixed sleep per chunk
+    global engine
+    if engine is None:
+        engine = ScanEngine(temperature=0.2, cache=ScanCache())
+    return engine
 
-    for file_path in files_to_scan:
-        if not force_rescan and file_path in already_scanned:
-            print(f"⏩ Skipping already scanned: {file_path}")
-            continue
-
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            print(f"🔧 Scanning {file_path}")
-            review = review_file(file_path, content)
-
-            status = (
-                "⚠️ Issue Found" if any(k in review.lower() for k in ["problem", "issue", "warning", "missing", "error", "fix"])
-                else "✅ No Major Issues"
-            ) if review else "❗ Error"
+def review_file(file_path, file_content):
+    # A failed request raises, so scan_project records "❗ Error" instead of treating it as a review
+    chunks = chunk_file(file_path, file_content, max_chunk_tokens)
+    return get_engine().review_chunks(file_path, chunks, analysis_prompt + error_context)
 
-            append_result_to_csv(csv_output, file_path, status, review)
+def review_path(file_path):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    print(f"🔧 Scanning {file_path}")
+    return review_file(file_path, content)
 
-        except Exception as e:
-            print(f"❗ Failed: {file_path}: {e}")
-            append_result_to_csv(csv_output, file_path, "❗ Error", str(e))
+def scan_project(project_path, csv_output, start_from=None, force_rescan=False):
+    global engine
+    # run_scan closes the engine when it finishes, so a later scan in this process starts a fresh one
+    if engine is not None and engine.closed:
+        engine = None
+    run_scan(get_engine(), project_path, csv_output, review_path, valid_extensions, excluded_folders,
+             excluded_files, start_from=start_from, force_rescan=force_rescan, walk_workers=walk_workers,
+             issue_keywords=ISSUE_KEYWORDS + ("missing", "fix"), normalize_paths=True)
 
 # ==============================
 # MAIN
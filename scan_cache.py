@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ==============================
+# CONFIGURATION
+# ==============================
+
+SCAN_CACHE_PATH = os.getenv("SCAN_CACHE_PATH", "scan_cache.sqlite3")
+
+# ==============================
+# CACHE
+# ==============================
+
+def review_key(model, temperature, messages):
+    # Identical prompt + chunk + model settings always produce the same cache entry
+    payload = json.dumps([model, temperature, messages], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ScanCache:
+    def __init__(self, path=SCAN_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                review TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                scanned_at REAL NOT NULL
+            )
+        """)
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute("SELECT review FROM reviews WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, review, model=None):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reviews (key, model, review, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, review, time.time())
+            )
+            self.connection.commit()
+
+    def file_unchanged(self, file_path):
+        # True if the file was reviewed before and its content has not changed since
+        with self.lock:
+            row = self.connection.execute("SELECT digest FROM files WHERE path = ?", (file_path,)).fetchone()
+        if not row:
+            return False
+        try:
+            return file_digest(file_path) == row[0]
+        except OSError:
+            return False
+
+    def record_file(self, file_path, digest=None):
+        digest = digest or file_digest(file_path)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, digest, scanned_at) VALUES (?, ?, ?)",
+                (file_path, digest, time.time())
+            )
+            self.connection.commit()
+
+    def seed_files(self, file_paths):
+        # Files reviewed before digests were tracked (listed in an older results CSV) get their current
+        # digest recorded once, so upgrading does not re-review and re-bill every one of them.
+        # This trusts that those files have not changed since the old result was written.
+        with self.lock:
+            known = {row[0] for row in self.connection.execute("SELECT path FROM files")}
+        seeded = 0
+        for file_path in file_paths:
+            if file_path in known:
+                continue
+            try:
+                digest = file_digest(file_path)
+            except OSError:
+                continue
+            with self.lock:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO files (path, digest, scanned_at) VALUES (?, ?, ?)",
+                    (file_path, digest, time.time())
+                )
+            seeded += 1
+        with self.lock:
+            self.connection.commit()
+        return seeded
+
+    def summary(self):
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def needs_scan(cache, file_path, already_scanned, force_rescan):
+    # A file listed in the results is skipped only while its content is unchanged;
+    # force_rescan reviews everything again, but unchanged chunks still come from the cache.
+    if force_rescan or file_path not in already_scanned:
+        return True
+    return not cache.file_unchanged(file_path)
@@ -0,0 +1,187 @@
+import os
+import re
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional; fall back to the ~4 characters per token estimate
+    _encoding = None
+
+# ==============================
+# CONFIGURATION
+# ==============================
+
+MAX_CHUNK_TOKENS = 1500
+# Share of the budget the per-chunk header (file path + imports) may use
+MAX_HEADER_SHARE = 0.2
+
+LANGUAGES = {
+    '.js': 'js', '.jsx': 'js', '.mjs': 'js', '.cjs': 'js', '.ts': 'js', '.tsx': 'js',
+    '.css': 'css', '.scss': 'css',
+    '.json': 'json',
+}
+
+IMPORT_LINE = re.compile(r"^\s*(import\s|export\s+\*\s+from\s|(const|let|var)\s+[\w{}\s,]+=\s*require\()")
+
+# ==============================
+# TOKENS
+# ==============================
+
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, (len(text) + 3) // 4)
+
+# ==============================
+# SPLITTING
+# ==============================
+
+def boundaries(text, language, split_depth=0):
+    # Offsets just after each newline reached at nesting depth `split_depth`, outside strings
+    # and comments. A cheap scanner, not a parser: quotes end at a newline (so JSX text such as
+    # "don't" cannot swallow the rest of the file) and regex literals are not recognised.
+    result = []
+    depth = 0
+    i = 0
+    n = len(text)
+    line_comments = language != 'css'
+    templates = language == 'js'
+    while i < n:
+        c = text[i]
+        nxt = text[i + 1] if i + 1 < n else ''
+        if c == '/' and nxt == '*':
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if line_comments and c == '/' and nxt == '/' and (i == 0 or text[i - 1] != ':'):
+            end = text.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if c in '"\'' or (templates and c == '`'):
+            i += 1
+            while i < n and text[i] != c:
+                if text[i] == '\\':
+                    i += 1
+                elif text[i] == '\n' and c != '`':
+                    break
+                i += 1
+            i += 1
+            continue
+        if c in '{[(':
+            depth += 1
+        elif c in '}])':
+            depth = max(0, depth - 1)
+        elif c == '\n' and depth == split_depth:
+            result.append(i + 1)
+        i += 1
+    return result
+
+def split_units(text, language, split_depth=0):
+    cuts = [0] + boundaries(text, language, split_depth) + [len(text)]
+    units = []
+    for start, end in zip(cuts, cuts[1:]):
+        if start < end:
+            units.append(text[start:end])
+    return merge_blank_units(units)
+
+def merge_blank_units(units):
+    # Keep comments, decorators and blank lines attached to the declaration that follows them
+    merged = []
+    carry = ''
+    for unit in units:
+        lines = unit.strip().splitlines()
+        if all(line.strip().startswith(('//', '/*', '*', '@')) for line in lines):
+            carry += unit
+            continue
+        merged.append(carry + unit)
+        carry = ''
+    if carry:
+        if merged:
+            merged[-1] += carry
+        else:
+            merged.append(carry)
+    return merged
+
+def split_lines(text, budget):
+    # Last resort for a unit that is too big even at deeper nesting levels
+    pieces, current = [], ''
+    for line in text.splitlines(keepends=True):
+        if current and count_tokens(current + line) > budget:
+            pieces.append(current)
+            current = ''
+        while count_tokens(line) > budget:
+            cut = max(1, len(line) * budget // count_tokens(line))
+            pieces.append(line[:cut])
+            line = line[cut:]
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def fit_unit(unit, language, budget, level=0):
+    # An oversized declaration is split along the members of its body (one nesting level down),
+    # up to three levels deep, before falling back to plain line packing
+    if count_tokens(unit) <= budget:
+        return [unit]
+    if language != 'text' and level < 3:
+        inner = split_units(unit, language, split_depth=1)
+        if len(inner) > 1:
+            pieces = []
+            for piece in inner:
+                pieces.extend(fit_unit(piece, language, budget, level + 1))
+            return pieces
+    return split_lines(unit, budget)
+
+# ==============================
+# CHUNKING
+# ==============================
+
+def build_header(file_path, import_lines, budget):
+    # Returns the header and the imports that did not fit in it; those are reviewed with the code
+    header = f"// File: {file_path}\n"
+    if not import_lines:
+        return header, []
+    header += "// Imports (shared context):\n"
+    for idx, line in enumerate(import_lines):
+        if count_tokens(header + line) > budget:
+            header += f"// ... {len(import_lines) - idx} more import(s) in the code below\n"
+            return header, import_lines[idx:]
+        header += line if line.endswith('\n') else line + '\n'
+    return header, []
+
+def chunk_file(file_path, content, max_tokens=MAX_CHUNK_TOKENS):
+    # Split a source file along top-level declarations and pack the pieces into chunks of at most
+    # `max_tokens`. Each chunk starts with a compact header: the file path and the file's imports.
+    language = LANGUAGES.get(os.path.splitext(file_path)[1].lower(), 'text')
+    if language == 'text':
+        units = content.splitlines(keepends=True)
+    elif language == 'json':
+        # A JSON document is one top-level value; its members live one level down
+        units = split_units(content, language, split_depth=1)
+    else:
+        units = split_units(content, language)
+
+    imports, body = [], []
+    for unit in units:
+        if language == 'js' and IMPORT_LINE.match(unit) and unit.count('\n') <= 12:
+            imports.append(unit)
+        else:
+            body.append(unit)
+
+    header, overflow = build_header(file_path, imports, int(max_tokens * MAX_HEADER_SHARE))
+    # Only the per-chunk copy is truncated: every import line is still sent at least once
+    body = overflow + body
+    budget = max(max_tokens - count_tokens(header), max_tokens // 2)
+
+    chunks, current, current_tokens = [], '', 0
+    for unit in body:
+        for piece in fit_unit(unit, language, budget):
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > budget:
+                chunks.append(current)
+                current, current_tokens = '', 0
+            current += piece
+            current_tokens += piece_tokens
+    if current.strip() or not chunks:
+        chunks.append(current)
+    return [header + chunk for chunk in chunks]
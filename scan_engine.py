@@ -0,0 +1,364 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scan_cache import review_key
+
+# ==============================
+# CONFIGURATION
+# ==============================
+
+# "openai" sends real requests; "mock" answers locally so throughput can be tested offline
+SCAN_BACKEND = os.getenv("SCAN_BACKEND", "openai")
+
+MAX_CONCURRENCY = int(os.getenv("SCAN_MAX_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("SCAN_REQUESTS_PER_MINUTE", "500"))
+TOKENS_PER_MINUTE = float(os.getenv("SCAN_TOKENS_PER_MINUTE", "30000"))
+# Attempts per request on transient (5xx / timeout) errors. Rate limits are not counted:
+# they lower concurrency and are retried until the quota frees up.
+MAX_RETRIES = 8
+
+# Budgeted per request on top of the prompt, since the reply size is unknown up front
+EXPECTED_OUTPUT_TOKENS = 800
+
+# ==============================
+# ERRORS
+# ==============================
+
+class RateLimited(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TransientError(Exception):
+    pass
+
+def parse_retry_after(error_message, default=10.0):
+    # "Rate limit reached ... Please try again in 6.3s."
+    if "Please try again in" in error_message:
+        try:
+            wait_str = error_message.split("Please try again in")[1].strip()
+            if wait_str.split('s')[0].endswith('m'):
+                return float(wait_str.split('ms')[0].strip()) / 1000
+            return float(wait_str.split('s')[0].strip())
+        except Exception:
+            pass
+    return default
+
+def estimate_tokens(text):
+    # ~4 characters per token for English and code
+    return max(1, len(text) // 4)
+
+# ==============================
+# RATE LIMITING
+# ==============================
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        # Take `amount` now (possibly going negative) and return how long the caller must wait
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.available -= amount
+            return 0.0 if self.available >= 0 else -self.available / self.rate
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens, stop=None):
+        # `stop` (a threading.Event) cuts the wait short when the scan is being shut down
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        with self.lock:
+            wait = max(wait, self.paused_until - time.monotonic())
+        if wait > 0:
+            if stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+
+    def pause(self, seconds):
+        # Server told us to back off: hold every worker, not just the one that was throttled
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class AdaptiveConcurrency:
+    def __init__(self, initial=4, minimum=1, maximum=MAX_CONCURRENCY):
+        self.limit = min(initial, maximum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        # Additive increase: one more slot per `limit` successful requests
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def on_throttle(self):
+        # Multiplicative decrease
+        with self.condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.successes = 0
+
+# ==============================
+# MODEL BACKENDS
+# ==============================
+
+class OpenAIBackend:
+    def __init__(self, model="gpt-4o"):
+        self.model = model
+
+    def complete(self, messages, temperature):
+        # Imported here so the mock backend runs without the openai package installed
+        import openai
+
+        try:
+            response = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature
+            )
+        except Exception as e:
+            error_message = str(e)
+            rate_limit_error = getattr(getattr(openai, "error", None), "RateLimitError", None)
+            if (rate_limit_error and isinstance(e, rate_limit_error)) or "Rate limit" in error_message:
+                raise RateLimited(error_message, parse_retry_after(error_message)) from e
+            if any(code in error_message for code in ("502", "503", "504", "Bad Gateway", "timed out")):
+                raise TransientError(error_message) from e
+            raise
+        usage = response.get('usage') or {}
+        return response['choices'][0]['message']['content'], usage.get('total_tokens')
+
+class MockBackend:
+    # Answers locally after a simulated latency. `requests_per_second` emulates a server-side quota:
+    # calls beyond it are rejected with the same "Please try again in" message the API sends.
+    def __init__(self, model="mock", latency=(0.05, 0.2), requests_per_second=None, error_rate=0.0, seed=None):
+        self.model = model
+        self.latency = latency
+        self.requests_per_second = requests_per_second
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = []
+        self.calls = 0
+
+    def complete(self, messages, temperature):
+        with self.lock:
+            self.calls += 1
+            now = time.monotonic()
+            self.recent = [t for t in self.recent if now - t < 1.0]
+            throttled = self.requests_per_second is not None and len(self.recent) >= self.requests_per_second
+            if not throttled:
+                self.recent.append(now)
+            roll = self.random.random()
+            delay = self.random.uniform(*self.latency)
+        if throttled:
+            retry_after = round(1.0 - (now - self.recent[0]), 3)
+            raise RateLimited(f"Rate limit reached (mock). Please try again in {retry_after}s.", retry_after)
+        time.sleep(delay)
+        if roll < self.error_rate:
+            raise TransientError("502 Bad Gateway (mock)")
+        content = messages[-1]['content']
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+        return f"Mock review {digest}: no issues in {len(content)} characters.", None
+
+def get_backend(name=None, model="gpt-4o"):
+    name = name or SCAN_BACKEND
+    if name == "mock":
+        return MockBackend(seed=0)
+    return OpenAIBackend(model)
+
+# ==============================
+# ENGINE
+# ==============================
+
+def fixed_size_chunks(content, max_chunk_size=3000):
+    return [content[i:i+max_chunk_size] for i in range(0, len(content), max_chunk_size)] or [content]
+
+class ScanEngine:
+    def __init__(self, backend=None, max_concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, temperature=0.2, max_retries=MAX_RETRIES, cache=None,
+                 progress=None):
+        self.backend = backend or get_backend()
+        self.cache = cache
+        # Optional per-chunk progress journal (ScanResultsStore) so an interrupted file resumes mid-way
+        self.progress = progress
+        self.temperature = temperature
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial=max(1, max_concurrency // 2), maximum=max_concurrency)
+        # Chunk requests and whole files run on separate pools so a file never waits on its own worker
+        self.request_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="scan-request")
+        self.file_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="scan-file")
+        self.stats = {"requests": 0, "tokens": 0, "rate_limited": 0, "transient_errors": 0, "failed": 0,
+                      "cache_hits": 0}
+        self.stats_lock = threading.Lock()
+        self.started = time.monotonic()
+        self.stopping = threading.Event()
+
+    @property
+    def closed(self):
+        return self.stopping.is_set()
+
+    def _count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def request(self, messages):
+        prompt_tokens = sum(estimate_tokens(m['content']) for m in messages)
+        attempt = 0
+        throttled = 0
+        while True:
+            self.limiter.acquire(prompt_tokens + EXPECTED_OUTPUT_TOKENS, self.stopping)
+            if self.stopping.is_set():
+                raise RuntimeError("Scan engine closed before the request was sent")
+            self.concurrency.acquire()
+            try:
+                text, used_tokens = self.backend.complete(messages, self.temperature)
+                self.concurrency.on_success()
+                self._count("requests")
+                self._count("tokens", used_tokens or prompt_tokens + estimate_tokens(text))
+                return text
+            except RateLimited as e:
+                throttled += 1
+                self._count("rate_limited")
+                self.concurrency.on_throttle()
+                self.limiter.pause(e.retry_after)
+                print(f"🚫 Rate limit hit ({throttled}x for this request), pausing {e.retry_after:.1f}s, "
+                      f"concurrency now {self.concurrency.limit}")
+            except TransientError as e:
+                attempt += 1
+                self._count("transient_errors")
+                self.concurrency.on_throttle()
+                if attempt >= self.max_retries:
+                    self._count("failed")
+                    raise RuntimeError(f"Gave up after {attempt} attempts: {e}") from e
+                wait_time = min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+                print(f"🌐 {e}. Retrying in {wait_time:.1f} seconds...")
+                self.stopping.wait(wait_time)
+            finally:
+                self.concurrency.release()
+
+    def cached_request(self, messages, key, file_path=None, index=None):
+        text = self.request(messages)
+        if self.cache is not None:
+            self.cache.put(key, text, self.backend.model)
+        if self.progress is not None:
+            self.progress.record_chunk(file_path, index, key, text)
+        return text
+
+    def review_chunks(self, file_path, chunks, system_prompt, user_template="{chunk}"):
+        # All chunks not yet reviewed (in the cache or this scan's progress journal) are requested
+        # concurrently and joined in order
+        results = []
+        for index, chunk in enumerate(chunks):
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_template.format(chunk=chunk)}
+            ]
+            if self.cache is None and self.progress is None:
+                results.append(self.request_pool.submit(self.request, messages))
+                continue
+            key = review_key(self.backend.model, self.temperature, messages)
+            done = self.progress.chunk_review(file_path, index, key) if self.progress is not None else None
+            if done is None and self.cache is not None:
+                done = self.cache.get(key)
+                if done is not None:
+                    self._count("cache_hits")
+            if done is not None:
+                results.append(done)
+            else:
+                results.append(self.request_pool.submit(self.cached_request, messages, key, file_path, index))
+        queued = sum(1 for r in results if not isinstance(r, str))
+        print(f"🧠 {queued}/{len(chunks)} chunk(s) queued for {file_path}")
+        return "\n\n".join(r if isinstance(r, str) else r.result() for r in results)
+
+    def scan(self, items, review):
+        # items: iterable of file paths; review(file_path) -> result.
+        # Yields (file_path, result or exception) as files finish, keeping a bounded number in flight.
+        max_in_flight = self.concurrency.maximum * 2
+        pending = {}
+        for file_path in items:
+            pending[self.file_pool.submit(review, file_path)] = file_path
+            if len(pending) >= max_in_flight:
+                yield from self._drain(pending, until=max_in_flight // 2)
+        yield from self._drain(pending, until=0)
+
+    def _drain(self, pending, until):
+        for future in as_completed(list(pending)):
+            file_path = pending.pop(future)
+            try:
+                yield file_path, future.result()
+            except Exception as e:
+                yield file_path, e
+            if len(pending) <= until:
+                return
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["elapsed_seconds"] = round(elapsed, 1)
+        stats["requests_per_minute"] = round(stats["requests"] / elapsed * 60, 1) if elapsed else 0.0
+        stats["concurrency_limit"] = self.concurrency.limit
+        return stats
+
+    def close(self):
+        # Also runs on Ctrl+C: queued files and chunk requests are cancelled instead of being sent,
+        # requests waiting on the rate limiter give up, and only calls already in flight are waited for
+        self.stopping.set()
+        self.request_pool.shutdown(wait=False, cancel_futures=True)
+        self.file_pool.shutdown(wait=True, cancel_futures=True)
+        self.request_pool.shutdown(wait=True)
+
+# ==============================
+# MAIN (offline throughput check)
+# ==============================
+
+if __name__ == "__main__":
+    backend = MockBackend(latency=(0.1, 0.3), requests_per_second=40, error_rate=0.01, seed=1)
+    engine = ScanEngine(backend, max_concurrency=16, requests_per_minute=3000, tokens_per_minute=1_000_000)
+    files = {f"file_{i}.js": "x" * random.Random(i).randint(500, 12000) for i in range(100)}
+
+    def review(file_path):
+        return engine.review_chunks(file_path, fixed_size_chunks(files[file_path]), "Review this code.")
+
+    for file_path, result in engine.scan(files, review):
+        if isinstance(result, Exception):
+            print(f"❗ Failed: {file_path}: {result}")
+    engine.close()
+    print(f"\n✅ Mock scan complete: {engine.summary()}")
@@ -0,0 +1,183 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+# ==============================
+# CONFIGURATION
+# ==============================
+
+CSV_FIELDS = ['File', 'Status', 'Comments']
+ERROR_STATUS = "❗ Error"
+
+# Writes are committed in batches: every BATCH_SIZE writes or FLUSH_INTERVAL seconds, whichever comes first
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 2.0
+
+# ==============================
+# RESULTS STORE
+# ==============================
+
+def journal_path_for(csv_path):
+    # scan_results.csv -> scan_results.sqlite3, next to the CSV it exports to
+    return os.path.splitext(csv_path)[0] + ".sqlite3"
+
+class ScanResultsStore:
+    # Scan results in a SQLite WAL journal kept open for the whole scan. Besides one row per file,
+    # it records each finished chunk so an interrupted scan resumes in the middle of a large file.
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                path TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                comments TEXT,
+                scanned_at REAL NOT NULL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                path TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                review TEXT NOT NULL,
+                PRIMARY KEY (path, idx)
+            )
+        """)
+        self.connection.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+        self.resumed_chunks = 0
+
+    @classmethod
+    def for_csv(cls, csv_path, **options):
+        # Opens the journal behind a results CSV; a CSV from before the journal existed is imported once
+        store = cls(journal_path_for(csv_path), **options)
+        if store.count() == 0 and os.path.exists(csv_path):
+            imported = store.import_csv(csv_path)
+            print(f"📥 Imported {imported} result(s) from {csv_path}")
+        return store
+
+    def _write(self, sql, params):
+        # Caller holds the lock
+        self.connection.execute(sql, params)
+        self.uncommitted += 1
+        if self.uncommitted >= self.batch_size or time.monotonic() - self.last_commit >= self.flush_interval:
+            self._commit()
+
+    def _commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    # ------------------------------
+    # Per-file results
+    # ------------------------------
+
+    def record_result(self, file_path, status, comments):
+        # The file is finished: its chunk progress is no longer needed
+        with self.lock:
+            self.connection.execute("DELETE FROM chunks WHERE path = ?", (file_path,))
+            self._write(
+                "INSERT OR REPLACE INTO results (path, status, comments, scanned_at) VALUES (?, ?, ?, ?)",
+                (file_path, status, comments, time.time())
+            )
+
+    def scanned_files(self):
+        with self.lock:
+            return {row[0] for row in self.connection.execute("SELECT path FROM results")}
+
+    def reviewed_files(self):
+        # Files whose last scan produced a review (not an error)
+        with self.lock:
+            return {row[0] for row in self.connection.execute(
+                "SELECT path FROM results WHERE status != ?", (ERROR_STATUS,)
+            )}
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    # ------------------------------
+    # Per-chunk progress
+    # ------------------------------
+
+    def chunk_review(self, file_path, index, key):
+        # Review of chunk `index` from an earlier, unfinished scan, if the chunk content is the same
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT key, review FROM chunks WHERE path = ? AND idx = ?", (file_path, index)
+            ).fetchone()
+        if row and row[0] == key:
+            self.resumed_chunks += 1
+            return row[1]
+        return None
+
+    def record_chunk(self, file_path, index, key, review):
+        with self.lock:
+            self._write(
+                "INSERT OR REPLACE INTO chunks (path, idx, key, review) VALUES (?, ?, ?, ?)",
+                (file_path, index, key, review)
+            )
+
+    # ------------------------------
+    # CSV import / export
+    # ------------------------------
+
+    def import_csv(self, csv_path):
+        with open(csv_path, mode='r', newline='', encoding='utf-8') as csvfile:
+            rows = [(row['File'], row.get('Status') or '', row.get('Comments'), time.time())
+                    for row in csv.DictReader(csvfile) if row.get('File')]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results (path, status, comments, scanned_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._commit()
+        return len(rows)
+
+    def export_csv(self, csv_path):
+        # Same File/Status/Comments layout the scanners always wrote, in scan order.
+        # Written to a temporary file first so a crash never leaves a truncated CSV behind.
+        with self.lock:
+            self._commit()
+            rows = self.connection.execute(
+                "SELECT path, status, comments FROM results ORDER BY scanned_at, rowid"
+            ).fetchall()
+        temp_path = csv_path + ".tmp"
+        with open(temp_path, mode='w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDS)
+            writer.writerows(rows)
+        os.replace(temp_path, csv_path)
+        return len(rows)
+
+    def flush(self):
+        with self.lock:
+            self._commit()
+
+    def close(self):
+        with self.lock:
+            self._commit()
+            self.connection.close()
+
+# ==============================
+# MAIN (export only)
+# ==============================
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("Usage: python scan_results_store.py <results.csv>")
+        sys.exit(1)
+    csv_output = sys.argv[1]
+    store = ScanResultsStore(journal_path_for(csv_output))
+    print(f"✅ Exported {store.export_csv(csv_output)} result(s) to {csv_output}")
+    store.close()
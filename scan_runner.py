@@ -0,0 +1,77 @@
+import os
+
+from scan_cache import needs_scan
+from scan_results_store import ERROR_STATUS, ScanResultsStore
+from scan_walker import walk_files
+
+# ==============================
+# CONFIGURATION
+# ==============================
+
+ISSUE_KEYWORDS = ("problem", "issue", "warning", "error")
+
+# ==============================
+# SCAN LOOP
+# ==============================
+
+def review_status(review, issue_keywords=ISSUE_KEYWORDS):
+    if not review:
+        return ERROR_STATUS
+    if any(keyword in review.lower() for keyword in issue_keywords):
+        return "⚠️ Issue Found"
+    return "✅ No Major Issues"
+
+def run_scan(engine, project_path, csv_output, review, extensions, excluded_folders=(), excluded_files=(),
+             issue_keywords=ISSUE_KEYWORDS, start_from=None, force_rescan=False, walk_workers=4,
+             normalize_paths=False, print_status=False):
+    # Shared by the scanner scripts, which pass their own engine, review function and file filters.
+    # Results go to a journal next to the CSV; the CSV itself is regenerated from it at the end.
+    results = ScanResultsStore.for_csv(csv_output)
+    already_scanned = results.scanned_files() if not force_rescan else set()
+    seeded = engine.cache.seed_files(results.reviewed_files())
+    if seeded:
+        print(f"🌱 Recorded digests for {seeded} file(s) reviewed before digests were tracked")
+    engine.progress = results
+    if start_from:
+        print(f"🔵 Resuming from file: {start_from}")
+
+    def files_to_scan():
+        # Discovery is lazy: review of the first files starts while the tree is still being walked
+        for file_path in walk_files(project_path, extensions, excluded_folders, excluded_files,
+                                    workers=walk_workers):
+            if normalize_paths:
+                file_path = os.path.normpath(file_path)
+            if start_from and file_path < start_from:
+                continue
+            if not needs_scan(engine.cache, file_path, already_scanned, force_rescan):
+                print(f"⏩ Skipping already scanned: {file_path}")
+                continue
+            yield file_path
+
+    # Files are reviewed concurrently; results are written here, on one thread, as they finish
+    try:
+        for file_path, result in engine.scan(files_to_scan(), review):
+            if isinstance(result, Exception):
+                print(f"❗ Failed: {file_path}: {result}")
+                results.record_result(file_path, ERROR_STATUS, str(result))
+                continue
+
+            status = review_status(result, issue_keywords)
+            if print_status:
+                print(f"    ➡️ {file_path}: {status}")
+            results.record_result(file_path, status, result)
+            # Only a complete review marks the content as done; failed chunks raise and never get here
+            if status != ERROR_STATUS:
+                engine.cache.record_file(file_path)
+    finally:
+        # Also runs on Ctrl+C: queued work is cancelled and in-flight chunks finish into the journal
+        # before it is closed, so finished files and chunks stay there for the next run
+        engine.close()
+        engine.progress = None
+        exported = results.export_csv(csv_output)
+        if results.resumed_chunks:
+            print(f"↩️ Resumed {results.resumed_chunks} chunk(s) from an interrupted scan")
+        results.close()
+        print(f"💾 {exported} result(s) written to {csv_output}")
+
+    print(f"\n📈 Scan stats: {engine.summary()} cache: {engine.cache.summary()}")
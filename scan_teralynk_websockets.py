@@ -1,15 +1,16 @@
 import openai
 import os
-import time
-import random
-import csv
+from scan_cache import ScanCache
+from scan_chunker import chunk_file
+from scan_engine import ScanEngine
+from scan_runner import run_scan
 
 # ==============================
 # CONFIGURATION
 # ==============================
 
 # OpenAI API Key
-openai.api_key =
+openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # Paths
 project_root = "/Users/patrick/Projects/Teralynk_Old"
@@ -25,13 +26,11 @@ valid_extensions = ('.js', '.jsx', '.ts', '.tsx', '.json', '.env')
 # Folders and files to exclude
 excluded_folders = {'node_modules', 'build', 'dist', '.git', '.next', '.vercel', '.vite'}
 excluded_files = {'package-lock.json'}
+# Directories listed concurrently while files are already being reviewed
+walk_workers = 4
 
-# Chunk size
-max_chunk_size = 3000
-
-# API pacing
-MIN_PAUSE = 6
-MAX_PAUSE = 8
+# Chunk size (tokens; chunks follow top-level declarations)
+max_chunk_tokens = 1500
 
 # Error context
 error_context = """
@@ -45,154 +44,41 @@ Investigate missing VITE_WS_PORT, VITE_WS_HOST environment variables, bad fallba
 # FUNCTIONS
 # ==============================
 
-def load_already_scanned_files(filename):
-    scanned = set()
-    if os.path.exists(filename):
-        with open(filename, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                scanned.add(row['File'])
-    return scanned
-
-def review_file(file_path, file_content):
-    try:
-        if len(file_content) <= max_chunk_size:
-            chunks = [file_content]
-        else:
-            chunks = [file_content[i:i+max_chunk_size] for i in range(0, len(file_content), max_chunk_size)]
-
-        all_reviews = []
-
-        for idx, chunk in enumerate(chunks):
-            attempt = 0
-            success = False
-
-            while not success:
-                try:
-                    print(f"    ✂️ Sending chunk {idx+1}/{len(chunks)} for {file_path} (Attempt {attempt+1})...")
-
-                    response = openai.ChatCompletion.create(
-                        model="gpt-4o",
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": (
-                                    "You are an expert engineer specializing in WebSocket, server environment, backend config, and client/server bugs."
-                                    "\n\n" + error_context
-                                )
-                            },
-                            {
-                                "role": "user",
-                                "content": f"Analyze this code chunk carefully:\n\n{chunk}"
-                            }
-                        ],
-                        temperature=0
-                    )
-
-                    review_text = response['choices'][0]['message']['content']
-                    all_reviews.append(review_text)
-                    success = True
-
-                    sleep_time = random.uniform(MIN_PAUSE, MAX_PAUSE)
-                    print(f"    ⏳ Waiting {sleep_time:.1f} seconds before next chunk...")
-                    time.sleep(sleep_time)
-
-                except openai.error.RateLimitError as e:
-                    wait_time = 10
-                    error_message = str(e)
-                    print(f"    🚫 Rate limit hit: {error_message}")
-
-                    if "Please try again in" in error_message:
-                        try:
-                            wait_str = error_message.split("Please try again in")[1]
-                            wait_time = float(wait_str.split('s')[0].strip())
-                        except Exception:
-                            pass
-
-                    print(f"    ⏳ Waiting {wait_time:.1f} seconds before retrying...")
-                    time.sleep(wait_time)
-
-                    attempt += 1
-
-                except Exception as e:
-                    print(f"❗ Unexpected error reviewing {file_path}: {e}")
-                    return f"Error reviewing file: {e}"
-
-        return "\n\n".join(all_reviews)
-
-    except Exception as e:
-        print(f"❗ General error reviewing {file_path}: {e}")
-        return f"Error reviewing file: {e}"
-
-def should_exclude(folder_path, filename):
-    for excluded in excluded_folders:
-        if excluded in folder_path:
-            return True
-    if filename in excluded_files:
-        return True
-    return False
-
-def append_result_to_csv(csv_file, file_path, status, comments):
-    file_exists = os.path.isfile(csv_file)
-    with open(csv_file, mode='a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['File', 'Status', 'Comments']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow({
-            'File': file_path,
-            'Status': status,
-            'Comments': comments
-        })
-
-def scan_project(project_path, csv_output, start_from=None, force_rescan=False):
-    already_scanned = load_already_scanned_files(csv_output) if not force_rescan else set()
-    files_to_scan = []
-
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not should_exclude(os.path.join(root, d), '')]
-
-        for filename in sorted(files):
-            if filename.endswith(valid_extensions) and not should_exclude(root, filename):
-                file_path = os.path.join(root, filename)
-                files_to_scan.append(file_path)
-
-    if start_from:
-        print(f"🔵 Resuming scan starting from file: {start_from}")
-        files_to_scan = [f for f in files_to_scan if f >= start_from]
+system_prompt = (
+    "You are an expert engineer specializing in WebSocket, server environment, backend config, and client/server bugs."
+    "\n\n" + error_context
+)
 
-    print(f"\n📋 {len(files_to_scan)} files to scan.\n")
+engine = None
 
-    for file_path in files_to_scan:
-        if not force_rescan and file_path in already_scanned:
-            print(f"⏩ Skipping already scanned: {file_path}")
-            continue
+def get_engine():
+    # Requests are paced by the engine's token buckets; rate-limit waits come from "Please try again in"
+    global engine
+    if engine is None:
+        engine = ScanEngine(temperature=0, cache=ScanCache())
+    return engine
 
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            print(f"🔍 Scanning {file_path}...")
-
-            review = review_file(file_path, content)
-
-            if review:
-                if any(keyword in review.lower() for keyword in ["problem", "issue", "warning", "error"]):
-                    status = "⚠️ Issue Found"
-                else:
-                    status = "✅ No Major Issues"
-            else:
-                status = "❗ Error"
-
-            print(f"    ➡️ {status}")
-
-            append_result_to_csv(csv_output, file_path, status, review)
+def review_file(file_path, file_content):
+    # A failed request raises, so scan_project records "❗ Error" instead of treating it as a review
+    chunks = chunk_file(file_path, file_content, max_chunk_tokens)
+    return get_engine().review_chunks(
+        file_path, chunks, system_prompt, "Analyze this code chunk carefully:\n\n{chunk}"
+    )
+
+def review_path(file_path):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    print(f"🔍 Scanning {file_path}...")
+    return review_file(file_path, content)
 
-        except Exception as e:
-            print(f"❗ Failed to read {file_path}: {e}")
-            append_result_to_csv(csv_output, file_path, "❗ Error", str(e))
+def scan_project(project_path, csv_output, start_from=None, force_rescan=False):
+    global engine
+    # run_scan closes the engine when it finishes, so a later scan in this process starts a fresh one
+    if engine is not None and engine.closed:
+        engine = None
+    run_scan(get_engine(), project_path, csv_output, review_path, valid_extensions, excluded_folders,
+             excluded_files, start_from=start_from, force_rescan=force_rescan, walk_workers=walk_workers,
+             print_status=True)
 
 # ==============================
 # MAIN
@@ -208,11 +94,6 @@ if __name__ == "__main__":
 
     if mode == "backend":
         print("\n📂 Backend-only scan selected!\n")
-        if not os.path.exists(output_csv_backend):
-            with open(output_csv_backend, mode='w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=['File', 'Status', 'Comments'])
-                writer.writeheader()
-
         scan_project(backend_folder, output_csv_backend, start_from if start_from else None, force_rescan)
 
     else:
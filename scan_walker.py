@@ -0,0 +1,195 @@
+import fnmatch
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================
+# IGNORE RULES
+# ==============================
+
+def glob_to_regex(pattern):
+    # gitignore-style glob: "*" and "?" stay within one path segment, "**" spans segments
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+class IgnoreRules:
+    # Rules from one .gitignore, matched against paths relative to the directory holding it
+    def __init__(self, base, lines):
+        self.base = base
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            if line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            prefix = '' if anchored else '(?:.*/)?'
+            self.rules.append((re.compile(f'^{prefix}{glob_to_regex(line)}$'), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory):
+        path = os.path.join(directory, '.gitignore')
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls(directory, f.readlines())
+        except OSError:
+            return None
+
+    def match(self, path, is_dir):
+        # None when no rule applies, otherwise whether the last matching rule ignores the path
+        relative = os.path.relpath(path, self.base).replace(os.sep, '/')
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                result = not negate
+        return result
+
+def is_ignored(rule_stack, path, is_dir):
+    # Deeper .gitignore files take precedence over their parents
+    for rules in reversed(rule_stack):
+        result = rules.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+def compile_names(patterns):
+    # Exact names and globs (e.g. "*.min.js") folded into one precompiled regex
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns))
+
+# ==============================
+# WALKER
+# ==============================
+
+class FileWalker:
+    def __init__(self, extensions=None, excluded_folders=(), excluded_files=(), use_gitignore=True):
+        self.extensions = tuple(extensions) if extensions else None
+        self.excluded_folders = compile_names(excluded_folders)
+        self.excluded_files = compile_names(excluded_files)
+        self.use_gitignore = use_gitignore
+
+    def _scan_dir(self, directory, rule_stack):
+        # One scandir pass: returns (sorted files to yield, sorted subdirectories with their rule stack)
+        if self.use_gitignore:
+            rules = IgnoreRules.load(directory)
+            if rules is not None:
+                rule_stack = rule_stack + [rules]
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if self.excluded_folders and self.excluded_folders.match(entry.name):
+                            continue
+                        if rule_stack and is_ignored(rule_stack, entry.path, True):
+                            continue
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        if self.extensions and not entry.name.endswith(self.extensions):
+                            continue
+                        if self.excluded_files and self.excluded_files.match(entry.name):
+                            continue
+                        if rule_stack and is_ignored(rule_stack, entry.path, False):
+                            continue
+                        files.append(entry.path)
+        except OSError as e:
+            print(f"❗ Cannot read {directory}: {e}")
+        files.sort()
+        subdirs.sort()
+        return files, [(subdir, rule_stack) for subdir in subdirs]
+
+    def walk(self, root, workers=1):
+        # Yields matching file paths while the tree is still being walked.
+        # workers=1 is a depth-first walk in sorted order; more workers scan directories in parallel
+        # (faster on network or cold filesystems) and yield files in completion order.
+        if workers <= 1:
+            yield from self._walk_sequential(root)
+        else:
+            yield from self._walk_parallel(root, workers)
+
+    def _walk_sequential(self, root):
+        stack = [(root, [])]
+        while stack:
+            directory, rule_stack = stack.pop()
+            files, subdirs = self._scan_dir(directory, rule_stack)
+            yield from files
+            stack.extend(reversed(subdirs))
+
+    def _walk_parallel(self, root, workers):
+        results = queue.Queue()
+        pending = [1]
+        lock = threading.Lock()
+        done = object()
+
+        def scan(directory, rule_stack):
+            try:
+                files, subdirs = self._scan_dir(directory, rule_stack)
+                for file_path in files:
+                    results.put(file_path)
+                with lock:
+                    pending[0] += len(subdirs)
+                for subdir, stack in subdirs:
+                    pool.submit(scan, subdir, stack)
+            finally:
+                with lock:
+                    pending[0] -= 1
+                    if pending[0] == 0:
+                        results.put(done)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-walk") as pool:
+            pool.submit(scan, root, [])
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                yield item
+
+def walk_files(root, extensions=None, excluded_folders=(), excluded_files=(), use_gitignore=True, workers=1):
+    walker = FileWalker(extensions, excluded_folders, excluded_files, use_gitignore)
+    return walker.walk(root, workers)